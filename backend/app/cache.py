@@ -0,0 +1,108 @@
+"""
+Cachés en memoria del proceso para lecturas frecuentes del catálogo
+"""
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable, Dict, Hashable, Optional
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+class LRUCache:
+    """
+    Caché acotada que descarta la entrada usada menos recientemente.
+    Con ttl (segundos) las entradas además vencen pasado ese tiempo
+    """
+    def __init__(self, maxsize: int = 256, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_set(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """
+        Devuelve el valor cacheado o lo calcula con loader. None no se cachea
+        """
+        value = self.get(key)
+        if value is None:
+            value = loader()
+            if value is not None:
+                self.set(key, value)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+        }
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+# Versión del catálogo de eventos: se incrementa en cada escritura y forma parte
+# de las claves de response_cache, así las entradas anteriores dejan de usarse
+_catalog_version = 0
+_catalog_lock = Lock()
+
+def get_catalog_version() -> int:
+    return _catalog_version
+
+def bump_catalog_version() -> int:
+    global _catalog_version
+    with _catalog_lock:
+        _catalog_version += 1
+        return _catalog_version
+
+# Sugerencias de búsqueda por prefijo normalizado
+suggestion_cache = LRUCache(maxsize=1024)
+
+# Totales exactos por combinación de filtros. Las escrituras de este proceso la vacían;
+# el TTL acota cuánto duran los totales tras escrituras de otros workers o de
+# scripts/import_events.py
+count_cache = LRUCache(maxsize=512, ttl=float(os.getenv("COUNT_CACHE_TTL", "60")))
+
+# Huella (max updated_at, cantidad de filas) por tabla para los ETag. El TTL corto
+# acota cuánto tarda un proceso en ver escrituras hechas por otros workers
+fingerprint_cache = LRUCache(maxsize=16, ttl=5)
+
+# Respuestas de las lecturas públicas de eventos
+response_cache = LRUCache(
+    maxsize=int(os.getenv("RESPONSE_CACHE_MAXSIZE", "1024")),
+    ttl=float(os.getenv("RESPONSE_CACHE_TTL", "60"))
+)
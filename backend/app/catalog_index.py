@@ -0,0 +1,173 @@
+"""
+Modelo de lectura columnar en memoria de los próximos eventos para los listados públicos
+"""
+from threading import RLock
+from typing import Dict, Iterable, List, Optional, Tuple
+from datetime import datetime
+import logging
+import os
+import time
+import numpy as np
+from . import schemas
+
+logger = logging.getLogger(__name__)
+
+# "memory" responde los listados sin búsqueda con CatalogIndex; "sql" (por defecto) usa siempre la consulta ORM
+CATALOG_ENGINE = os.getenv("CATALOG_ENGINE", "sql")
+
+class _Dictionary:
+    """
+    Codifica strings como enteros: -1 representa None y lookup devuelve -2 (que no
+    coincide con ninguna fila) para valores que no aparecen en el índice
+    """
+    def __init__(self):
+        self.codes: Dict[str, int] = {}
+
+    def encode(self, value: Optional[str]) -> int:
+        if value is None:
+            return -1
+        return self.codes.setdefault(value, len(self.codes))
+
+    def lookup(self, value: str) -> int:
+        return self.codes.get(value, -2)
+
+class CatalogIndex:
+    """
+    Eventos con fecha >= since guardados como columnas contiguas ordenadas por (date, id):
+    city y genre codificados por diccionario y date_types como matriz booleana
+    (filas x tipos). Los rangos de fecha y el cursor se resuelven con searchsorted y el
+    resto de filtros con máscaras vectorizadas. Igual que SpatialIndex, se reconstruye
+    completo cada max_age segundos y se actualiza de forma incremental con las escrituras
+    de este proceso
+    """
+    def __init__(self, max_age: float = 60):
+        self.max_age = max_age
+        self._entries: Dict[int, schemas.Event] = {}
+        self._columns: Optional[dict] = None
+        self._since: Optional[datetime] = None
+        self._built_at: Optional[float] = None
+        self._lock = RLock()
+
+    def is_stale(self) -> bool:
+        return self._built_at is None or time.monotonic() - self._built_at > self.max_age
+
+    def invalidate(self) -> None:
+        """
+        Fuerza una reconstrucción completa en la próxima consulta
+        """
+        self._built_at = None
+
+    def covers(self, date_from: Optional[datetime]) -> bool:
+        """
+        True si todos los eventos con fecha >= date_from están en el índice
+        """
+        return date_from is not None and self._since is not None and date_from >= self._since
+
+    def rebuild(self, events: Iterable, since: datetime) -> None:
+        with self._lock:
+            self._entries = {
+                event.id: schemas.Event.model_validate(event, from_attributes=True) for event in events
+            }
+            self._since = since
+            self._columns = None
+            self._built_at = time.monotonic()
+        logger.info(f"CatalogIndex - reconstruido con {len(self._entries)} eventos desde {since}")
+
+    def upsert(self, event) -> None:
+        with self._lock:
+            self._entries.pop(event.id, None)
+            if self._since is not None and event.date >= self._since:
+                self._entries[event.id] = schemas.Event.model_validate(event, from_attributes=True)
+            self._columns = None
+
+    def remove(self, event_id: int) -> None:
+        with self._lock:
+            if self._entries.pop(event_id, None) is not None:
+                self._columns = None
+
+    def _get_columns(self) -> dict:
+        """
+        Columnas ordenadas por (date, id); se regeneran tras cada cambio
+        """
+        if self._columns is None:
+            rows = sorted(self._entries.values(), key=lambda event: (event.date, event.id))
+            cities, genres, types = _Dictionary(), _Dictionary(), _Dictionary()
+            city_codes = np.array([cities.encode(row.city) for row in rows], dtype=np.int32)
+            genre_codes = np.array([genres.encode(row.genre) for row in rows], dtype=np.int32)
+            type_codes = [[types.encode(value) for value in row.date_types or ()] for row in rows]
+            type_matrix = np.zeros((len(rows), len(types.codes)), dtype=bool)
+            for position, codes in enumerate(type_codes):
+                type_matrix[position, codes] = True
+            self._columns = {
+                "dates": np.array([row.date for row in rows], dtype="datetime64[us]"),
+                "ids": np.array([row.id for row in rows], dtype=np.int64),
+                "cities": city_codes,
+                "genres": genre_codes,
+                "date_types": type_matrix,
+                "dictionaries": (cities, genres, types),
+                "rows": rows,
+            }
+        return self._columns
+
+    def query(
+        self,
+        genre: Optional[str] = None,
+        city: Optional[str] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        date_types: Optional[List[str]] = None,
+        date_types_match: str = "all",
+        after: Optional[Tuple[datetime, int]] = None,
+        skip: int = 0,
+        limit: Optional[int] = None
+    ) -> Tuple[int, List[schemas.Event]]:
+        """
+        (total, página) de los eventos que cumplen los filtros, ordenados por (date, id).
+        date_to es exclusivo y after es la clave (date, id) del último evento de la
+        página anterior; como el COUNT de SQL, total no depende de after ni de skip
+        """
+        with self._lock:
+            columns = self._get_columns()
+        dates, ids, rows = columns["dates"], columns["ids"], columns["rows"]
+        cities, genres, types = columns["dictionaries"]
+
+        start, stop = 0, len(rows)
+        if date_from is not None:
+            start = int(np.searchsorted(dates, np.datetime64(date_from, "us"), side="left"))
+        if date_to is not None:
+            stop = int(np.searchsorted(dates, np.datetime64(date_to, "us"), side="left"))
+        if start >= stop:
+            return 0, []
+
+        mask = np.ones(stop - start, dtype=bool)
+        if genre:
+            mask &= columns["genres"][start:stop] == genres.lookup(genre)
+        if city:
+            mask &= columns["cities"][start:stop] == cities.lookup(city)
+        if date_types:
+            codes = [types.lookup(value) for value in date_types]
+            known = [code for code in codes if code >= 0]
+            band = columns["date_types"][start:stop]
+            if date_types_match == "any":
+                mask &= band[:, known].any(axis=1)
+            elif len(known) < len(codes):
+                # Un tipo que ningún evento tiene: nadie los tiene todos
+                mask[:] = False
+            else:
+                mask &= band[:, known].all(axis=1)
+        positions = start + np.flatnonzero(mask)
+        total = int(positions.size)
+        if after is not None:
+            # Primer (date, id) > after: las fechas iguales están ordenadas por id
+            after_date = np.datetime64(after[0], "us")
+            low = int(np.searchsorted(dates, after_date, side="left"))
+            high = int(np.searchsorted(dates, after_date, side="right"))
+            first = low + int(np.searchsorted(ids[low:high], after[1], side="right"))
+            positions = positions[np.searchsorted(positions, first, side="left"):]
+        page = positions[skip:] if limit is None else positions[skip:skip + limit]
+        return total, [rows[position] for position in page]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+catalog_index = CatalogIndex()
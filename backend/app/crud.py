@@ -1,71 +1,399 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import func, or_, and_
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import func, or_, and_, tuple_, text, true, select, union_all, literal
+from sqlalchemy.exc import OperationalError
 from . import models, schemas, security
-from typing import List, Optional
-from datetime import datetime, date
+from .cache import suggestion_cache, count_cache, fingerprint_cache, bump_catalog_version
+from .geo import bounding_box_filter, haversine_sql
+from .spatial_index import event_spatial_index, venue_spatial_index, NEARBY_ENGINE
+from .catalog_index import catalog_index, CATALOG_ENGINE
+from typing import List, Optional, Tuple
+from datetime import datetime, date, time, timedelta
+import base64
+import bisect
+import json
+import logging
 
-def get_events(
-    db: Session,
-    skip: int = 0,
-    limit: int = 100,
+logger = logging.getLogger(__name__)
+
+# Tiempo máximo para las consultas de sugerencias (typeahead)
+SUGGEST_TIMEOUT_MS = 50
+
+def _encode_cursor_payload(values: list) -> str:
+    payload = json.dumps(values, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+def _decode_cursor_payload(cursor: str) -> list:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    return json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+
+def encode_cursor(event_date: datetime, event_id: int) -> str:
+    """
+    Codifica la posición (date, id) del último evento de una página como cursor opaco
+    """
+    return _encode_cursor_payload([event_date.isoformat(), event_id])
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Decodifica un cursor generado por encode_cursor. Lanza ValueError si es inválido
+    """
+    try:
+        raw_date, raw_id = _decode_cursor_payload(cursor)
+        return datetime.fromisoformat(raw_date), int(raw_id)
+    except Exception as e:
+        raise ValueError("Cursor inválido") from e
+
+def encode_distance_cursor(distance: float, event_id: int) -> str:
+    """
+    Codifica la posición (distance, id) del último evento de una página de cercanía
+    """
+    return _encode_cursor_payload([distance, event_id])
+
+def decode_distance_cursor(cursor: str) -> Tuple[float, int]:
+    """
+    Decodifica un cursor generado por encode_distance_cursor. Lanza ValueError si es inválido
+    """
+    try:
+        raw_distance, raw_id = _decode_cursor_payload(cursor)
+        return float(raw_distance), int(raw_id)
+    except Exception as e:
+        raise ValueError("Cursor inválido") from e
+
+def _estimate_count(db: Session, query) -> int:
+    """
+    Estima la cantidad de filas de una consulta a partir de las estadísticas del planner
+    """
+    statement = query.statement.compile(dialect=db.get_bind().dialect)
+    plan = db.connection().exec_driver_sql(
+        f"EXPLAIN (FORMAT JSON) {statement}", statement.params
+    ).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+def _count_total(db: Session, query, include_total: str, cache_key: tuple) -> Optional[int]:
+    """
+    Calcula el total según include_total: "false" (sin total), "exact" (COUNT cacheado
+    por filtros hasta la próxima escritura) o "estimate" (estimación del planner)
+    """
+    if include_total == "exact":
+        total = count_cache.get(cache_key)
+        if total is None:
+            total = query.count()
+            count_cache.set(cache_key, total)
+        return total
+    if include_total == "estimate":
+        return _estimate_count(db, query)
+    return None
+
+def _invalidate_event_caches():
+    """
+    Descarta las cachés derivadas del catálogo de eventos tras una escritura
+    """
+    suggestion_cache.clear()
+    count_cache.clear()
+    fingerprint_cache.clear()
+    bump_catalog_version()
+
+def _invalidate_venue_caches():
+    """
+    Descarta las cachés derivadas de la tabla de venues tras una escritura
+    """
+    count_cache.clear()
+    fingerprint_cache.clear()
+
+def _apply_event_filters(
+    query,
     genre: Optional[str] = None,
     city: Optional[str] = None,
     date_from: Optional[date] = None,
     date_to: Optional[date] = None,
     search: Optional[str] = None,
-    date_types: Optional[List[str]] = None
+    date_types: Optional[List[str]] = None,
+    date_types_match: str = "all"
 ):
-    query = db.query(models.Event)
-    
+    """
+    Aplica los filtros públicos de la agenda. Devuelve (query, ts_query); ts_query
+    es la consulta full-text cuando hay búsqueda, para ordenar por relevancia
+    """
     # Apply filters
     if genre:
         query = query.filter(models.Event.genre == genre)
     if city:
         query = query.filter(models.Event.city == city)
+    # Rangos semiabiertos [date_from 00:00, date_to + 1 día 00:00) sobre la columna
+    # sin envolver, para que el planner pueda usar los índices sobre date
     if date_from:
-        query = query.filter(func.date(models.Event.date) >= date_from)
+        query = query.filter(models.Event.date >= datetime.combine(date_from, time.min))
     if date_to:
-        query = query.filter(func.date(models.Event.date) <= date_to)
+        query = query.filter(models.Event.date < datetime.combine(date_to + timedelta(days=1), time.min))
+    ts_query = None
     if search:
         # Validación adicional de seguridad para el parámetro de búsqueda
         if len(search) > 100:
             search = search[:100]  # Limitar longitud
         
-        search_filter = or_(
-            models.Event.name.ilike(f"%{search}%"),
-            models.Event.artist.ilike(f"%{search}%"),
-            models.Event.description.ilike(f"%{search}%")
-        )
-        query = query.filter(search_filter)
+        # Búsqueda full-text sobre search_vector (índice GIN)
+        ts_query = func.websearch_to_tsquery(models.SEARCH_CONFIG, search)
+        query = query.filter(models.Event.search_vector.op("@@")(ts_query))
     if date_types:
-        # Filtrar eventos que tengan todas las características seleccionadas
-        query = query.filter(models.Event.date_types.contains(date_types))
+        if date_types_match == "any":
+            # Eventos que tengan alguna de las características seleccionadas (&&)
+            query = query.filter(models.Event.date_types.overlap(date_types))
+        else:
+            # Filtrar eventos que tengan todas las características seleccionadas (@>)
+            query = query.filter(models.Event.date_types.contains(date_types))
+    return query, ts_query
+
+def get_events(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    genre: Optional[str] = None,
+    city: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    search: Optional[str] = None,
+    date_types: Optional[List[str]] = None,
+    date_types_match: str = "all",
+    cursor: Optional[str] = None,
+    include_total: str = "false"
+):
+    if CATALOG_ENGINE == "memory" and not search:
+        # Listados de próximos eventos sin búsqueda: se resuelven con catalog_index
+        # cuando el índice contiene todos los eventos desde date_from
+        if catalog_index.is_stale():
+            since = _start_of_today()
+            catalog_index.rebuild(_load_upcoming_events(db, since), since)
+        since_date = datetime.combine(date_from, time.min) if date_from else None
+        if catalog_index.covers(since_date):
+            return _get_events_from_index(
+                skip, limit, genre, city, since_date, date_to, date_types, date_types_match, cursor, include_total
+            )
     
-    # Count total results
-    total = query.count()
+    query, ts_query = _apply_event_filters(
+        db.query(models.Event), genre, city, date_from, date_to, search, date_types, date_types_match
+    )
     
-    # Order by date and apply pagination
-    events = query.order_by(models.Event.date).offset(skip).limit(limit + 1).all()
+    # Count total results only when requested; hasMore comes from the extra row
+    total = _count_total(
+        db, query, include_total,
+        ("events", genre, city, date_from, date_to, search, tuple(date_types or ()), date_types_match)
+    )
+    
+    if ts_query is not None:
+        # Search results are ranked by relevance, so they page by offset only
+        query = query.order_by(
+            func.ts_rank(models.Event.search_vector, ts_query).desc(),
+            models.Event.date,
+            models.Event.id
+        )
+        cursor = None
+    else:
+        # Order by (date, id) so pages are stable when several events share a date
+        query = query.order_by(models.Event.date, models.Event.id)
+    if cursor:
+        # Keyset pagination: continue right after the last item of the previous page
+        cursor_date, cursor_id = decode_cursor(cursor)
+        query = query.filter(tuple_(models.Event.date, models.Event.id) > tuple_(cursor_date, cursor_id))
+    else:
+        query = query.offset(skip)
+    events = query.limit(limit + 1).all()
     
     # Check if there are more results
     has_more = len(events) > limit
     if has_more:
         events = events[:-1]  # Remove the extra item we fetched
     
+    next_cursor = None
+    if has_more and events and ts_query is None:
+        next_cursor = encode_cursor(events[-1].date, events[-1].id)
+    
     return {
         "items": events,
         "total": total,
-        "hasMore": has_more
+        "hasMore": has_more,
+        "nextCursor": next_cursor
+    }
+
+def _load_upcoming_events(db: Session, since: datetime):
+    return db.query(models.Event).filter(models.Event.date >= since).all()
+
+def _get_events_from_index(
+    skip: int,
+    limit: int,
+    genre: Optional[str],
+    city: Optional[str],
+    date_from: datetime,
+    date_to: Optional[date],
+    date_types: Optional[List[str]],
+    date_types_match: str,
+    cursor: Optional[str],
+    include_total: str
+):
+    """
+    Mismo resultado que get_events sin búsqueda, resuelto con catalog_index
+    """
+    after = decode_cursor(cursor) if cursor else None
+    total, events = catalog_index.query(
+        genre=genre,
+        city=city,
+        date_from=date_from,
+        date_to=datetime.combine(date_to + timedelta(days=1), time.min) if date_to else None,
+        date_types=date_types,
+        date_types_match=date_types_match,
+        after=after,
+        skip=0 if after else skip,
+        limit=limit + 1
+    )
+    has_more = len(events) > limit
+    if has_more:
+        events = events[:-1]
+    
+    return {
+        "items": events,
+        # En memoria el conteo es exacto y gratuito, también para "estimate"
+        "total": total if include_total != "false" else None,
+        "hasMore": has_more,
+        "nextCursor": encode_cursor(events[-1].date, events[-1].id) if has_more else None
     }
 
+def get_event_suggestions(db: Session, q: str, limit: int = 5):
+    """
+    Devuelve artistas, lugares y nombres de eventos distintos que coinciden con q,
+    ordenados por similitud trigram. Los resultados se cachean por prefijo normalizado
+    """
+    prefix = " ".join(q.lower().split())[:50]
+    cache_key = (prefix, limit)
+    cached = suggestion_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
+    # Escapar comodines de LIKE: el patrón %q% se resuelve con los índices gin_trgm_ops
+    pattern = "%" + prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+    suggestions = {"artists": [], "venues": [], "names": []}
+    try:
+        db.execute(text(f"SET LOCAL statement_timeout = {SUGGEST_TIMEOUT_MS}"))
+        for key, column in (
+            ("artists", models.Event.artist),
+            ("venues", models.Event.venue),
+            ("names", models.Event.name),
+        ):
+            rows = (
+                db.query(column)
+                .filter(column.ilike(pattern))
+                .group_by(column)
+                .order_by(func.similarity(column, prefix).desc(), column)
+                .limit(limit)
+                .all()
+            )
+            suggestions[key] = [row[0] for row in rows]
+    except OperationalError as e:
+        # Si se excede el tiempo límite devolvemos lo obtenido sin cachearlo
+        logger.warning(f"get_event_suggestions - consulta cancelada para '{prefix}': {e}")
+        db.rollback()
+        return suggestions
+    
+    suggestion_cache.set(cache_key, suggestions)
+    return suggestions
+
 def get_event(db: Session, event_id: int):
     return db.query(models.Event).filter(models.Event.id == event_id).first()
 
+def _venue_mirror_fields(venue: models.Venue) -> dict:
+    """
+    Campos de Event que replican los datos de su venue asociado
+    """
+    fields = {"venue": venue.name}
+    if venue.location or venue.address:
+        fields["location"] = venue.location or venue.address
+    if venue.city:
+        fields["city"] = venue.city
+    if venue.latitude is not None and venue.longitude is not None:
+        fields["latitude"] = venue.latitude
+        fields["longitude"] = venue.longitude
+    return fields
+
+def _apply_venue(db: Session, db_event: models.Event):
+    """
+    Si el evento está asociado a un venue, copia sus datos sobre los campos replicados
+    """
+    if db_event.venue_id is None:
+        return
+    db_venue = get_venue(db, db_event.venue_id)
+    if db_venue is None:
+        raise ValueError(f"Venue {db_event.venue_id} not found")
+    for key, value in _venue_mirror_fields(db_venue).items():
+        setattr(db_event, key, value)
+
+def get_event_detail(
+    db: Session,
+    event_id: int,
+    include_venue: bool = True,
+    include_related: bool = True,
+    related_limit: int = 4
+):
+    """
+    Evento con su venue y los próximos eventos del mismo artista y del mismo venue,
+    resueltos en una sola consulta (UNION ALL de ramas indexadas + join al venue)
+    """
+    event_table = models.Event
+    branches = [select(event_table.id, literal("self").label("relation")).where(event_table.id == event_id)]
+    if include_related:
+        target = db.query(event_table.artist, event_table.venue_id, event_table.venue, event_table.city).filter(
+            event_table.id == event_id
+        ).subquery()
+        upcoming = event_table.date >= _start_of_today()
+        branches.append(
+            select(event_table.id, literal("artist").label("relation"))
+            .where(event_table.artist == target.c.artist, event_table.id != event_id, upcoming)
+            .order_by(event_table.date, event_table.id)
+            .limit(related_limit)
+        )
+        # Por venue_id si está asociado; si no, por nombre de venue y ciudad. Son dos
+        # ramas excluyentes para que cada una use un predicado simple e indexable
+        for same_venue in (
+            event_table.venue_id == target.c.venue_id,
+            and_(target.c.venue_id.is_(None), event_table.city == target.c.city, event_table.venue == target.c.venue),
+        ):
+            branches.append(
+                select(event_table.id, literal("venue").label("relation"))
+                .where(same_venue, event_table.id != event_id, upcoming)
+                .order_by(event_table.date, event_table.id)
+                .limit(related_limit)
+            )
+    
+    matched = union_all(*branches).subquery()
+    query = db.query(event_table, matched.c.relation).join(matched, matched.c.id == event_table.id)
+    if include_venue:
+        query = query.options(joinedload(event_table.venue_ref))
+    rows = query.order_by(event_table.date, event_table.id).all()
+    
+    detail = None
+    related = {"artist": [], "venue": []}
+    for db_event, relation in rows:
+        if relation == "self":
+            detail = db_event
+        else:
+            related[relation].append(db_event)
+    if detail is None:
+        return None
+    
+    return {
+        "event": detail,
+        "venue_details": detail.venue_ref if include_venue else None,
+        "more_by_artist": related["artist"] if include_related else None,
+        "more_at_venue": related["venue"] if include_related else None,
+    }
+
 def create_event(db: Session, event: schemas.EventCreate):
     db_event = models.Event(**event.dict())
+    _apply_venue(db, db_event)
     db.add(db_event)
     db.commit()
     db.refresh(db_event)
+    event_spatial_index.upsert(db_event)
+    catalog_index.upsert(db_event)
+    _invalidate_event_caches()
     return db_event
 
 def update_event(db: Session, event_id: int, event: schemas.EventUpdate):
@@ -73,9 +401,13 @@ def update_event(db: Session, event_id: int, event: schemas.EventUpdate):
     if db_event:
         for key, value in event.dict(exclude_unset=True).items():
             setattr(db_event, key, value)
+        _apply_venue(db, db_event)
         db_event.updated_at = func.now()
         db.commit()
         db.refresh(db_event)
+        event_spatial_index.upsert(db_event)
+        catalog_index.upsert(db_event)
+        _invalidate_event_caches()
     return db_event
 
 def delete_event(db: Session, event_id: int):
@@ -83,48 +415,156 @@ def delete_event(db: Session, event_id: int):
     if db_event:
         db.delete(db_event)
         db.commit()
+        event_spatial_index.remove(event_id)
+        catalog_index.remove(event_id)
+        _invalidate_event_caches()
         return True
     return False
 
+def get_event_facets(
+    db: Session,
+    genre: Optional[str] = None,
+    city: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    search: Optional[str] = None,
+    date_types: Optional[List[str]] = None,
+    date_types_match: str = "all"
+):
+    """
+    Cuenta eventos por género, ciudad y date_type para los filtros aplicados,
+    en una sola consulta con GROUPING SETS
+    """
+    date_type = func.unnest(models.Event.date_types).table_valued("date_type").render_derived(name="dt")
+    genre_col, city_col, type_col = models.Event.genre, models.Event.city, date_type.c.date_type
+    query = (
+        db.query(
+            genre_col,
+            city_col,
+            type_col,
+            func.grouping(genre_col).label("g_genre"),
+            func.grouping(city_col).label("g_city"),
+            func.count(models.Event.id.distinct()).label("count"),
+        )
+        .select_from(models.Event)
+        .outerjoin(date_type, true())
+    )
+    query, _ = _apply_event_filters(
+        query, genre, city, date_from, date_to, search, date_types, date_types_match
+    )
+    rows = query.group_by(
+        func.grouping_sets(tuple_(genre_col), tuple_(city_col), tuple_(type_col))
+    ).all()
+    
+    facets = {"genres": [], "cities": [], "date_types": []}
+    for row_genre, row_city, row_type, g_genre, g_city, count in rows:
+        if g_genre == 0:
+            key, value = "genres", row_genre
+        elif g_city == 0:
+            key, value = "cities", row_city
+        else:
+            key, value = "date_types", row_type
+        if value is not None:
+            facets[key].append({"value": value, "count": count})
+    for values in facets.values():
+        values.sort(key=lambda facet: (-facet["count"], facet["value"]))
+    return facets
+
+def get_event_calendar(db: Session, month: date, city: Optional[str] = None, genre: Optional[str] = None):
+    """
+    Cantidad de eventos por día del mes que empieza en month, en una sola consulta
+    agrupada sobre el rango semiabierto del mes. Solo se devuelven los días con eventos
+    """
+    month_start = datetime.combine(month.replace(day=1), time.min)
+    next_month = (month_start + timedelta(days=32)).replace(day=1)
+    day = func.date(models.Event.date)
+    query = db.query(day.label("day"), func.count(models.Event.id).label("count")).filter(
+        models.Event.date >= month_start,
+        models.Event.date < next_month
+    )
+    query, _ = _apply_event_filters(query, genre=genre, city=city)
+    rows = query.group_by(day).order_by(day).all()
+    return {
+        "month": month_start.strftime("%Y-%m"),
+        "days": [{"date": row_day, "count": count} for row_day, count in rows]
+    }
+
 def get_genres(db: Session):
     return db.query(models.Event.genre).distinct().all()
 
 def get_cities(db: Session):
     return db.query(models.Event.city).distinct().all()
 
+def get_nearest_events(db: Session, lat: float, lng: float, k: int = 20):
+    """
+    Get the k upcoming events closest to the given coordinates, whatever the radius
+    """
+    since = _start_of_today()
+    if NEARBY_ENGINE == "memory":
+        if event_spatial_index.is_stale():
+            event_spatial_index.rebuild(_load_upcoming_geo_events(db))
+        items = [
+            schemas.NearbyEvent(**event.model_dump(), distance=distance)
+            for distance, event in event_spatial_index.query_nearest(lat, lng, k, since)
+        ]
+    else:
+        distance_expr = haversine_sql(models.Event.latitude, models.Event.longitude, lat, lng)
+        results = db.query(models.Event, distance_expr.label('distance')).filter(
+            models.Event.latitude.isnot(None),
+            models.Event.longitude.isnot(None),
+            models.Event.date >= since
+        ).order_by('distance', models.Event.id).limit(k).all()
+        items = []
+        for event, distance in results:
+            event.distance = distance  # Atributo no mapeado, lo expone schemas.NearbyEvent
+            items.append(event)
+    
+    return {
+        "items": items,
+        "total": len(items),
+        "hasMore": False
+    }
+
 def get_nearby_events(
     db: Session,
     lat: float,
     lng: float,
     radius: float = 50,  # km
     skip: int = 0,
-    limit: int = 12
+    limit: int = 12,
+    include_total: str = "false",
+    cursor: Optional[str] = None
 ):
     """
-    Get events within a certain radius of given coordinates using Haversine formula
+    Get upcoming events within a certain radius of given coordinates using Haversine formula.
+    With NEARBY_ENGINE=memory the in-process spatial index answers instead of Postgres
     """
-    # Haversine formula in SQL
-    # 6371 is Earth's radius in kilometers
-    distance_expr = 6371 * func.acos(
-        func.cos(func.radians(lat)) *
-        func.cos(func.radians(models.Event.latitude)) *
-        func.cos(func.radians(models.Event.longitude) - func.radians(lng)) +
-        func.sin(func.radians(lat)) *
-        func.sin(func.radians(models.Event.latitude))
-    )
+    since = _start_of_today()
+    after = decode_distance_cursor(cursor) if cursor else None
+    if NEARBY_ENGINE == "memory":
+        return _get_nearby_events_from_index(db, lat, lng, radius, since, skip, limit, include_total, after)
+    
+    distance_expr = haversine_sql(models.Event.latitude, models.Event.longitude, lat, lng)
     
-    # Query events with coordinates, calculate distance, and filter by radius
+    # The bounding box uses ix_events_lat_lng to discard far rows before the trig runs.
+    # Events linked to a venue carry a copy of its coordinates, so the box covers them too
     query = db.query(models.Event, distance_expr.label('distance')).filter(
         models.Event.latitude.isnot(None),
         models.Event.longitude.isnot(None),
+        models.Event.date >= since,
+        bounding_box_filter(models.Event.latitude, models.Event.longitude, lat, lng, radius),
         distance_expr <= radius
-    ).order_by('distance')
+    ).order_by('distance', models.Event.id)
     
-    # Count total results
-    total = query.count()
+    # Count total results only when requested
+    total = _count_total(db, query, include_total, ("nearby", lat, lng, radius, since))
     
-    # Apply pagination
-    results = query.offset(skip).limit(limit + 1).all()
+    # Apply pagination: keyset on (distance, id) when a cursor is given
+    if after:
+        query = query.filter(tuple_(distance_expr, models.Event.id) > tuple_(*after))
+    else:
+        query = query.offset(skip)
+    results = query.limit(limit + 1).all()
     
     # Check if there are more results
     has_more = len(results) > limit
@@ -132,14 +572,121 @@ def get_nearby_events(
         results = results[:-1]  # Remove the extra item we fetched
     
     # Extract events from results (results are tuples of (event, distance))
-    events = [result[0] for result in results]
+    events = []
+    for event, distance in results:
+        event.distance = distance  # Atributo no mapeado, lo expone schemas.NearbyEvent
+        events.append(event)
     
     return {
         "items": events,
         "total": total,
-        "hasMore": has_more
+        "hasMore": has_more,
+        "nextCursor": encode_distance_cursor(events[-1].distance, events[-1].id) if has_more else None
+    }
+
+def _start_of_today() -> datetime:
+    return datetime.combine(date.today(), time.min)
+
+def _load_upcoming_geo_events(db: Session):
+    return db.query(models.Event).filter(
+        models.Event.latitude.isnot(None),
+        models.Event.longitude.isnot(None),
+        models.Event.date >= _start_of_today()
+    ).all()
+
+def _get_nearby_events_from_index(
+    db: Session,
+    lat: float,
+    lng: float,
+    radius: float,
+    since: datetime,
+    skip: int,
+    limit: int,
+    include_total: str,
+    after: Optional[Tuple[float, int]] = None
+):
+    """
+    Mismo resultado que la consulta SQL de get_nearby_events, resuelto con event_spatial_index
+    """
+    if event_spatial_index.is_stale():
+        event_spatial_index.rebuild(_load_upcoming_geo_events(db))
+    
+    matches = event_spatial_index.query_radius(lat, lng, radius, since)
+    if after:
+        # Búsqueda binaria del primer evento posterior a (distance, id) del cursor
+        keys = [(distance, event.id) for distance, event in matches]
+        start = bisect.bisect_right(keys, after)
+    else:
+        start = skip
+    page = matches[start:start + limit + 1]
+    has_more = len(page) > limit
+    if has_more:
+        page = page[:-1]
+    
+    return {
+        "items": [schemas.NearbyEvent(**event.model_dump(), distance=distance) for distance, event in page],
+        "total": len(matches) if include_total != "false" else None,
+        "hasMore": has_more,
+        "nextCursor": encode_distance_cursor(page[-1][0], page[-1][1].id) if has_more else None
     }
 
+# A partir de este zoom el mapa recibe marcadores individuales en vez de clusters
+MAP_MARKER_ZOOM = 13
+MAP_MARKER_LIMIT = 500
+
+def map_cell_size(zoom: int) -> float:
+    """
+    Tamaño en grados de la celda de clustering: un cuarto de tile web mercator
+    """
+    return 360.0 / (2 ** zoom) / 4
+
+def get_event_map(db: Session, min_lat: float, min_lng: float, max_lat: float, max_lng: float, zoom: int):
+    """
+    Clusters (cantidad y centroide por celda de la grilla) de los próximos eventos dentro
+    del bbox, o marcadores individuales mínimos a partir de MAP_MARKER_ZOOM
+    """
+    base_filters = (
+        models.Event.latitude.between(min_lat, max_lat),
+        models.Event.longitude.between(min_lng, max_lng),
+        models.Event.date >= _start_of_today(),
+    )
+    if zoom >= MAP_MARKER_ZOOM:
+        markers = (
+            db.query(
+                models.Event.id,
+                models.Event.name,
+                models.Event.artist,
+                models.Event.venue,
+                models.Event.date,
+                models.Event.latitude,
+                models.Event.longitude,
+            )
+            .filter(*base_filters)
+            .order_by(models.Event.date, models.Event.id)
+            .limit(MAP_MARKER_LIMIT)
+            .all()
+        )
+        return {"zoom": zoom, "clusters": [], "markers": [row._asdict() for row in markers]}
+    
+    cell = map_cell_size(zoom)
+    cell_lat = func.floor(models.Event.latitude / cell)
+    cell_lng = func.floor(models.Event.longitude / cell)
+    rows = (
+        db.query(
+            func.count(models.Event.id),
+            func.avg(models.Event.latitude),
+            func.avg(models.Event.longitude),
+        )
+        .filter(*base_filters)
+        .group_by(cell_lat, cell_lng)
+        .all()
+    )
+    clusters = [
+        {"count": count, "latitude": float(latitude), "longitude": float(longitude)}
+        for count, latitude, longitude in rows
+    ]
+    return {"zoom": zoom, "clusters": clusters, "markers": []}
+
 def create_event_request(db: Session, event_request: schemas.EventRequestCreate):
     import logging
     logger = logging.getLogger(__name__)
@@ -171,15 +718,22 @@ def create_event_request(db: Session, event_request: schemas.EventRequestCreate)
     db.add(db_request)
     db.commit()
     db.refresh(db_request)
+    count_cache.clear()
     
     logger.info(f"crud.create_event_request - Solicitud creada con ID: {db_request.id}")
     return db_request
 
-def get_event_requests(db: Session, skip: int = 0, limit: int = 100, status: Optional[str] = None):
+def get_event_requests(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    status: Optional[str] = None,
+    include_total: str = "false"
+):
     query = db.query(models.EventRequest)
     if status:
         query = query.filter(models.EventRequest.status == status)
-    total = query.count()
+    total = _count_total(db, query, include_total, ("event_requests", status))
     requests = query.order_by(models.EventRequest.created_at.desc()).offset(skip).limit(limit).all()
     return {"items": requests, "total": total}
 
@@ -190,10 +744,18 @@ def update_event_request_status(db: Session, request_id: int, status: str):
         db_request.updated_at = func.now()
         db.commit()
         db.refresh(db_request)
+        count_cache.clear()
     return db_request 
 
 # Venue CRUD operations
-def get_venues(db: Session, skip: int = 0, limit: int = 100, city: Optional[str] = None, search: Optional[str] = None):
+def get_venues(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    city: Optional[str] = None,
+    search: Optional[str] = None,
+    include_total: str = "false"
+):
     query = db.query(models.Venue)
     
     if city:
@@ -209,14 +771,70 @@ def get_venues(db: Session, skip: int = 0, limit: int = 100, city: Optional[str]
         )
         query = query.filter(search_filter)
     
-    total = query.count()
-    venues = query.order_by(models.Venue.name).offset(skip).limit(limit).all()
+    total = _count_total(db, query, include_total, ("venues", city, search))
+    venues = query.order_by(models.Venue.name, models.Venue.id).offset(skip).limit(limit + 1).all()
+    
+    has_more = len(venues) > limit
+    if has_more:
+        venues = venues[:-1]
     
     return {
         "items": venues,
-        "total": total
+        "total": total,
+        "hasMore": has_more
     }
 
+def get_nearby_venues(
+    db: Session,
+    lat: float,
+    lng: float,
+    radius: Optional[float] = None,
+    k: Optional[int] = None,
+    limit: int = 50
+):
+    """
+    Venues a radius km o menos de (lat, lng), o los k más cercanos, ordenados por (distancia, id).
+    Usa venue_spatial_index con NEARBY_ENGINE=memory y la consulta con bounding box si no
+    """
+    size = k if k is not None else limit
+    if NEARBY_ENGINE == "memory":
+        if venue_spatial_index.is_stale():
+            venue_spatial_index.rebuild(
+                db.query(models.Venue).filter(
+                    models.Venue.latitude.isnot(None),
+                    models.Venue.longitude.isnot(None)
+                ).all()
+            )
+        if k is not None:
+            matches = venue_spatial_index.query_nearest(lat, lng, k)
+        else:
+            matches = venue_spatial_index.query_radius(lat, lng, radius)
+        has_more = len(matches) > size
+        items = [
+            schemas.NearbyVenue(**venue.model_dump(), distance=distance)
+            for distance, venue in matches[:size]
+        ]
+        # Sin total, igual que la consulta SQL: la forma de la respuesta no depende del motor
+        return {"items": items, "total": None, "hasMore": has_more}
+    
+    distance_expr = haversine_sql(models.Venue.latitude, models.Venue.longitude, lat, lng)
+    query = db.query(models.Venue, distance_expr.label('distance')).filter(
+        models.Venue.latitude.isnot(None),
+        models.Venue.longitude.isnot(None)
+    )
+    if k is None:
+        query = query.filter(
+            bounding_box_filter(models.Venue.latitude, models.Venue.longitude, lat, lng, radius),
+            distance_expr <= radius
+        )
+    results = query.order_by('distance', models.Venue.id).limit(size + 1).all()
+    has_more = k is None and len(results) > size
+    venues = []
+    for venue, distance in results[:size]:
+        venue.distance = distance  # Atributo no mapeado, lo expone schemas.NearbyVenue
+        venues.append(venue)
+    return {"items": venues, "total": None, "hasMore": has_more}
+
 def get_venue(db: Session, venue_id: int):
     return db.query(models.Venue).filter(models.Venue.id == venue_id).first()
 
@@ -225,23 +843,50 @@ def create_venue(db: Session, venue: schemas.VenueCreate):
     db.add(db_venue)
     db.commit()
     db.refresh(db_venue)
+    venue_spatial_index.upsert(db_venue)
+    _invalidate_venue_caches()
     return db_venue
 
 def update_venue(db: Session, venue_id: int, venue: schemas.VenueUpdate):
     db_venue = db.query(models.Venue).filter(models.Venue.id == venue_id).first()
     if db_venue:
-        for key, value in venue.dict(exclude_unset=True).items():
+        changes = venue.dict(exclude_unset=True)
+        for key, value in changes.items():
             setattr(db_venue, key, value)
         db_venue.updated_at = func.now()
+        # Propagar los cambios a los eventos asociados
+        mirror = _venue_mirror_fields(db_venue)
+        if ("latitude" in changes or "longitude" in changes) and "latitude" not in mirror:
+            # Se borraron las coordenadas del venue: no dejar en los eventos las copiadas antes
+            mirror.update(latitude=None, longitude=None)
+        linked = db.query(models.Event).filter(models.Event.venue_id == venue_id).update(
+            {**mirror, "updated_at": func.now()}, synchronize_session=False
+        )
         db.commit()
         db.refresh(db_venue)
+        venue_spatial_index.upsert(db_venue)
+        _invalidate_venue_caches()
+        if linked:
+            event_spatial_index.invalidate()
+            catalog_index.invalidate()
+            _invalidate_event_caches()
     return db_venue
 
 def delete_venue(db: Session, venue_id: int):
     db_venue = db.query(models.Venue).filter(models.Venue.id == venue_id).first()
     if db_venue:
+        # Desvincular los eventos antes del ON DELETE SET NULL, que no actualiza updated_at
+        linked = db.query(models.Event).filter(models.Event.venue_id == venue_id).update(
+            {"venue_id": None, "updated_at": func.now()}, synchronize_session=False
+        )
         db.delete(db_venue)
         db.commit()
+        venue_spatial_index.remove(venue_id)
+        _invalidate_venue_caches()
+        if linked:
+            event_spatial_index.invalidate()
+            catalog_index.invalidate()
+            _invalidate_event_caches()
         return True
     return False
 
@@ -257,9 +902,11 @@ def bulk_create_venues(db: Session, venues: List[schemas.VenueCreate]):
     
     db.add_all(db_venues)
     db.commit()
+    _invalidate_venue_caches()
     
     # Refresh all venues to get their IDs
     for venue in db_venues:
         db.refresh(venue)
+        venue_spatial_index.upsert(venue)
     
     return db_venues 
\ No newline at end of file
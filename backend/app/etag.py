@@ -0,0 +1,55 @@
+"""
+Soporte de GET condicional (ETag / Last-Modified) para los endpoints del catálogo
+"""
+from fastapi import Request, Response
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from email.utils import format_datetime
+from datetime import date, datetime, timezone
+from typing import Optional, Tuple
+import hashlib
+from .cache import fingerprint_cache, get_catalog_version
+
+def table_fingerprint(db: Session, model) -> Tuple[Optional[datetime], int]:
+    """
+    Devuelve (max updated_at, cantidad de filas) de la tabla del modelo
+    """
+    key = (model.__tablename__, get_catalog_version())
+    fingerprint = fingerprint_cache.get(key)
+    if fingerprint is None:
+        fingerprint = tuple(db.query(func.max(model.updated_at), func.count(model.id)).one())
+        fingerprint_cache.set(key, fingerprint)
+    return fingerprint
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return etag in candidates or f"W/{etag}" in candidates
+
+def check_not_modified(
+    request: Request, response: Response, db: Session, model, date_dependent: bool = False
+) -> Optional[Response]:
+    """
+    Calcula ETag y Last-Modified para la representación pedida y los agrega a response.
+    Devuelve una respuesta 304 si el cliente ya tiene esa versión, o None para seguir.
+    Con date_dependent (endpoints que filtran por fecha >= hoy) el ETag incluye la fecha
+    actual, para que cambie a medianoche aunque la tabla no cambie
+    """
+    last_modified, row_count = table_fingerprint(db, model)
+    seed = f"{model.__tablename__}:{last_modified}:{row_count}:{request.url.path}?{sorted(request.query_params.multi_items())}"
+    if date_dependent:
+        seed += f":{date.today().isoformat()}"
+    etag = '"' + hashlib.sha1(seed.encode("utf-8")).hexdigest() + '"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if last_modified is not None:
+        last_modified = last_modified.replace(tzinfo=last_modified.tzinfo or timezone.utc, microsecond=0)
+        headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+    
+    # Solo se valida con el ETag: If-Modified-Since compararía únicamente max(updated_at),
+    # que no cambia al borrar filas, así que se ignora
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
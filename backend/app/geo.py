@@ -0,0 +1,75 @@
+"""
+Utilidades geográficas compartidas por las búsquedas por cercanía
+"""
+from sqlalchemy import func, and_
+from typing import Optional, Tuple
+import math
+import numpy as np
+
+# Radio medio de la Tierra en kilómetros
+EARTH_RADIUS_KM = 6371.0
+# Kilómetros por grado de latitud
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+def bounding_box(lat: float, lng: float, radius: float) -> Tuple[float, float, Optional[float], Optional[float]]:
+    """
+    Devuelve (min_lat, max_lat, min_lng, max_lng) que contiene el círculo de radio
+    radius (km) alrededor de (lat, lng). Los límites de longitud son None cuando el
+    círculo cruza un polo o el antimeridiano y no se puede acotar la longitud
+    """
+    delta_lat = radius / KM_PER_DEGREE
+    min_lat, max_lat = max(lat - delta_lat, -90.0), min(lat + delta_lat, 90.0)
+    if min_lat <= -90.0 or max_lat >= 90.0:
+        return min_lat, max_lat, None, None
+    
+    delta_lng = delta_lat / math.cos(math.radians(max(abs(min_lat), abs(max_lat))))
+    min_lng, max_lng = lng - delta_lng, lng + delta_lng
+    if min_lng < -180.0 or max_lng > 180.0:
+        return min_lat, max_lat, None, None
+    return min_lat, max_lat, min_lng, max_lng
+
+def bounding_box_filter(lat_col, lng_col, lat: float, lng: float, radius: float):
+    """
+    Predicado SQL indexable que descarta las filas fuera del bounding box
+    """
+    min_lat, max_lat, min_lng, max_lng = bounding_box(lat, lng, radius)
+    conditions = [lat_col.between(min_lat, max_lat)]
+    if min_lng is not None:
+        conditions.append(lng_col.between(min_lng, max_lng))
+    return and_(*conditions)
+
+def haversine_sql(lat_col, lng_col, lat: float, lng: float):
+    """
+    Distancia en km entre (lat, lng) y las columnas dadas (ley esférica de cosenos).
+    El argumento de acos se acota a [-1, 1] para evitar errores por redondeo
+    """
+    return EARTH_RADIUS_KM * func.acos(func.least(1.0, func.greatest(-1.0,
+        func.cos(func.radians(lat)) *
+        func.cos(func.radians(lat_col)) *
+        func.cos(func.radians(lng_col) - func.radians(lng)) +
+        func.sin(func.radians(lat)) *
+        func.sin(func.radians(lat_col))
+    )))
+
+def haversine(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """
+    Misma fórmula que haversine_sql, evaluada en Python
+    """
+    lat1_rad, lat2_rad = math.radians(lat1), math.radians(lat2)
+    cos_angle = (
+        math.cos(lat1_rad) * math.cos(lat2_rad) * math.cos(math.radians(lng2) - math.radians(lng1)) +
+        math.sin(lat1_rad) * math.sin(lat2_rad)
+    )
+    return EARTH_RADIUS_KM * math.acos(min(1.0, max(-1.0, cos_angle)))
+
+def haversine_np(lat: float, lng: float, lats: np.ndarray, lngs: np.ndarray) -> np.ndarray:
+    """
+    Misma fórmula que haversine_sql sobre arrays contiguos de latitudes y longitudes
+    """
+    lat_rad = math.radians(lat)
+    lats_rad = np.radians(lats)
+    cos_angle = (
+        math.cos(lat_rad) * np.cos(lats_rad) * np.cos(np.radians(lngs) - math.radians(lng)) +
+        math.sin(lat_rad) * np.sin(lats_rad)
+    )
+    return EARTH_RADIUS_KM * np.arccos(np.clip(cos_angle, -1.0, 1.0))
@@ -1,11 +1,11 @@
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from . import models, auth
 from .database import engine, get_db
 from .routers import events, auth as auth_router
 from .routers import event_requests, upload, venues
-from .middleware import add_security_middleware
+from .middleware import add_security_middleware, RequestLoggingMiddleware
 import os
 import logging
 from dotenv import load_dotenv
@@ -68,37 +68,8 @@ app.add_middleware(
 # Agregar middleware de seguridad DESPUÉS del CORS
 add_security_middleware(app)
 
-# Middleware para verificar que los headers CORS se estén aplicando
-@app.middleware("http")
-async def check_cors_headers(request: Request, call_next):
-    logger.info(f"Recibida solicitud a: {request.url.path}")
-    logger.info(f"Método: {request.method}")
-    logger.info(f"Origin: {request.headers.get('origin', 'No origin header')}")
-    import time
-    start_time = time.time()
-    try:
-        logger.info("Antes de call_next(request)")
-        # --- PATCH: Read and re-inject body for POST/PUT/PATCH ---
-        if request.method in ("POST", "PUT", "PATCH"):
-            body = await request.body()
-            # (Optional) Log body size or content for debugging
-            logger.info(f"[PATCH] Middleware - Body read, reinjecting for downstream. Size: {len(body)} bytes")
-            async def receive():
-                return {"type": "http.request", "body": body}
-            request._receive = receive
-        # --- END PATCH ---
-        response = await call_next(request)
-        logger.info("Después de call_next(request)")
-    except Exception as e:
-        logger.error(f"Excepción en call_next: {e}", exc_info=True)
-        raise
-    finally:
-        elapsed = time.time() - start_time
-        logger.info(f"Tiempo transcurrido en call_next: {elapsed:.2f} segundos")
-    # Loguear los headers para depuración
-    logger.info(f"Response status: {response.status_code}")
-    logger.info(f"Response CORS headers: {dict(response.headers)}")
-    return response
+# Log de cada solicitud (método, path, status y duración); se agrega último para medir todo el stack
+app.add_middleware(RequestLoggingMiddleware)
 
 # Include routers
 app.include_router(events.router)
@@ -109,7 +80,7 @@ app.include_router(venues.router)
 
 # Añadir un endpoint explícito para /events para asegurar que funciona
 @app.get("/events")
-def read_events_direct(request: Request):
+def read_events_direct(request: Request, response: Response):
     """Endpoint directo para /events que redirige al router"""
     logger.info(f"GET /events request received directly in main.py")
     logger.info(f"Redirigiendo a router de events...")
@@ -125,10 +96,13 @@ def read_events_direct(request: Request):
     date_from = params.get("date_from")
     date_to = params.get("date_to")
     search = params.get("search")
+    cursor = params.get("cursor")
+    include_total = params.get("include_total", "false")
     
     # Llamar a la función del enrutador
     return read_events_root(
         request=request,
+        response=response,
         skip=skip,
         limit=limit,
         genre=genre,
@@ -136,6 +110,10 @@ def read_events_direct(request: Request):
         date_from=date_from,
         date_to=date_to,
         search=search,
+        date_types=None,
+        date_types_match="all",
+        cursor=cursor,
+        include_total=include_total,
         db=db
     )
 
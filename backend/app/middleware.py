@@ -2,11 +2,15 @@
 Middleware de seguridad para validar y sanitizar solicitudes HTTP
 """
 from fastapi import Request, HTTPException
+from fastapi.dependencies.utils import get_flat_dependant
+from starlette.datastructures import QueryParams
 from fastapi.responses import JSONResponse
+import codecs
 import re
 import json
-from typing import Dict, Any
+from typing import Dict, Any, Iterable, List, Optional, Pattern, Tuple
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -34,54 +38,284 @@ XSS_PATTERNS = re.compile(
     re.IGNORECASE
 )
 
+# Límites de tamaño del body: general (uploads) y para JSON/formularios, que se validan ya parseados
+MAX_BODY_SIZE = 10 * 1024 * 1024
+MAX_STRUCTURED_BODY_SIZE = 1024 * 1024
+# Caracteres del chunk anterior que se vuelven a escanear junto con el siguiente, para
+# detectar patrones partidos entre chunks
+SCAN_WINDOW = 4096
+# Etiquetas de XSS_PATTERNS: las que quedan abiertas en la última línea escaneada se
+# siguen por su cierre literal en los chunks siguientes
+XSS_TAGS = ("script", "iframe", "object", "embed")
+# Caracteres del texto anterior que se revisan para aperturas y cierres partidos entre chunks
+OPEN_TAG_OVERLAP = len("<script") - 1
+CLOSE_TAG_OVERLAP = len("</script>") - 1
+
+# Unión de ambos patrones para recorrer cada valor una sola vez
+THREAT_PATTERN = re.compile(
+    f"(?:{SQL_INJECTION_PATTERNS.pattern})|(?:{XSS_PATTERNS.pattern})",
+    re.IGNORECASE
+)
+
+def contains_threat(value: str) -> bool:
+    """
+    True si value contiene SQLi/XSS según SQL_INJECTION_PATTERNS o XSS_PATTERNS. Los
+    valores alfanuméricos se descartan sin regex, y como toda coincidencia de
+    XSS_PATTERNS incluye "</" (una búsqueda literal), sin ese literal solo se evalúa
+    el patrón SQL, que no tiene los .*? que pueden volverse cuadráticos
+    """
+    if not value or value.isalnum():
+        return False
+    if "</" not in value:
+        return SQL_INJECTION_PATTERNS.search(value) is not None
+    return THREAT_PATTERN.search(value) is not None
+
+class _BodyInspector:
+    """
+    Valida el body chunk a chunk a medida que la aplicación lo lee. multipart solo se
+    limita por tamaño; JSON y formularios se acumulan (hasta MAX_STRUCTURED_BODY_SIZE) y
+    se validan parseados al llegar el último chunk, quedando en body; el resto se escanea
+    de forma incremental conservando del chunk anterior SCAN_WINDOW caracteres. Las
+    etiquetas abiertas en la última línea que quedan fuera de esa ventana solo se siguen
+    por su cierre literal en el texto nuevo, así que cada chunk se procesa una sola vez
+    """
+    def __init__(self, middleware: "SecurityMiddleware", content_type: str):
+        self.middleware = middleware
+        self.content_type = content_type
+        self.size = 0
+        if "multipart/form-data" in content_type:
+            self.mode, self.limit = "multipart", MAX_BODY_SIZE
+        elif "application/json" in content_type or "application/x-www-form-urlencoded" in content_type:
+            self.mode, self.limit = "structured", MAX_STRUCTURED_BODY_SIZE
+        else:
+            self.mode, self.limit = "scan", MAX_BODY_SIZE
+        self._chunks: List[bytes] = []
+        self.body: Optional[bytes] = None
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+        self._tail = ""
+        self._tail_pos = 0
+        self._open_tags: set = set()
+        self._close_overlap = ""
+
+    def feed(self, chunk: bytes, more_body: bool) -> Optional[Tuple[int, str]]:
+        """
+        Procesa un chunk; devuelve (status, mensaje) si la solicitud debe rechazarse
+        """
+        self.size += len(chunk)
+        if self.size > self.limit:
+            logger.warning(f"Middleware - Body demasiado grande ({self.mode}): más de {self.limit} bytes")
+            return 413, "Solicitud demasiado grande"
+        
+        if self.mode == "structured":
+            self._chunks.append(chunk)
+            if not more_body:
+                # Con un solo chunk join devuelve el mismo objeto, sin copiarlo
+                self.body, self._chunks = b"".join(self._chunks), []
+                if self.body and not self.middleware._validate_request_body(self.body, self.content_type):
+                    return 400, "Contenido de solicitud inválido"
+        elif self.mode == "scan":
+            new_text = self._decoder.decode(chunk, final=not more_body)
+            text = self._tail + new_text
+            # pos salta el carácter que solo se conserva como contexto para los \b
+            pattern = THREAT_PATTERN if "</" in text else SQL_INJECTION_PATTERNS
+            if pattern.search(text, self._tail_pos) or self._closes_open_tag(new_text):
+                logger.warning("Middleware - Contenido malicioso en body")
+                return 400, "Contenido de solicitud inválido"
+            # XSS_PATTERNS no cruza saltos de línea: solo las aperturas de la última línea
+            # pueden cerrarse en un chunk posterior
+            line_start = text.rfind("\n") + 1
+            openings = text[max(line_start, len(self._tail) - OPEN_TAG_OVERLAP):].casefold()
+            self._open_tags.update(tag for tag in XSS_TAGS if "<" + tag in openings)
+            self._close_overlap = text[max(line_start, len(text) - CLOSE_TAG_OVERLAP):].casefold()
+            window_start = max(len(text) - (SCAN_WINDOW + 1), 0)
+            if window_start > 0:
+                self._tail, self._tail_pos = text[window_start:], 1
+            else:
+                self._tail = text
+        return None
+
+    def _closes_open_tag(self, new_text: str) -> bool:
+        """
+        True si la primera línea de new_text (junto con el final del texto anterior)
+        contiene el cierre de alguna etiqueta abierta en la línea en curso; como
+        XSS_PATTERNS, compara sin distinguir mayúsculas
+        """
+        if not self._open_tags:
+            return False
+        line_end = new_text.find("\n")
+        segment = self._close_overlap + (new_text if line_end < 0 else new_text[:line_end]).casefold()
+        closed = any(f"</{tag}>" in segment for tag in self._open_tags)
+        if line_end >= 0:
+            self._open_tags = set()
+        return closed
+
+# Niveles de validación por ruta: nada, solo query string, o headers + query + body
+POLICY_NONE = "none"
+POLICY_QUERY = "query"
+POLICY_BODY = "body"
+BODY_METHODS = {"POST", "PUT", "PATCH"}
+# Rutas excluidas de la validación estricta (autenticación, uploads y solicitudes de eventos)
+EXEMPT_PATHS = {"/auth/token", "/auth/login"}
+EXEMPT_PREFIXES = ("/upload/", "/event-requests/")
+
+def default_policy(method: str) -> str:
+    return POLICY_BODY if method in BODY_METHODS else POLICY_QUERY
+
+def _reads_request(dependant) -> bool:
+    """
+    True si el endpoint o alguna de sus dependencias recibe el Request (y podría leer
+    la query string directamente)
+    """
+    return bool(dependant.request_param_name or dependant.http_connection_param_name) or any(
+        _reads_request(sub_dependant) for sub_dependant in dependant.dependencies
+    )
+
+def route_policy(route, method: str) -> str:
+    """
+    Nivel de validación de una ruta para un método. Las lecturas que no declaran query
+    params ni reciben el Request no usan la query string, así que no se valida
+    """
+    if route.path in EXEMPT_PATHS or route.path.startswith(EXEMPT_PREFIXES):
+        return POLICY_NONE
+    dependant = getattr(route, "dependant", None)
+    if method in BODY_METHODS or dependant is None:
+        return default_policy(method)
+    if get_flat_dependant(dependant).query_params or _reads_request(dependant):
+        return POLICY_QUERY
+    return POLICY_NONE
+
+def _first_segment(path: str) -> str:
+    return path[1:].split("/", 1)[0]
+
+class RoutePolicyTable:
+    """
+    Nivel de validación de cada ruta, compilado al arrancar. Los paths fijos se resuelven
+    con un dict; los que tienen parámetros, con el path_regex de las rutas agrupadas por
+    primer segmento. Las rutas desconocidas usan default_policy según el método
+    """
+    def __init__(self):
+        # Las exclusiones valen aunque la tabla no se haya compilado
+        self._static: Dict[str, Dict[str, str]] = {path: {"*": POLICY_NONE} for path in EXEMPT_PATHS}
+        self._dynamic: Dict[str, List[Tuple[Pattern, Dict[str, str]]]] = {}
+
+    def compile(self, routes: Iterable) -> None:
+        static = {path: {"*": POLICY_NONE} for path in EXEMPT_PATHS}
+        dynamic: Dict[str, List[Tuple[Pattern, Dict[str, str]]]] = {}
+        for route in routes:
+            methods = getattr(route, "methods", None)
+            if not methods:
+                continue
+            levels = {method: route_policy(route, method) for method in methods}
+            if "{" in route.path:
+                segment = _first_segment(route.path)
+                dynamic.setdefault("*" if "{" in segment else segment, []).append((route.path_regex, levels))
+            else:
+                static.setdefault(route.path, {}).update(levels)
+        self._static, self._dynamic = static, dynamic
+        logger.info(f"RoutePolicyTable - compiladas {len(static)} rutas fijas y {sum(map(len, dynamic.values()))} con parámetros")
+
+    def lookup(self, method: str, path: str) -> str:
+        if path.startswith(EXEMPT_PREFIXES):
+            return POLICY_NONE
+        levels = self._static.get(path)
+        if levels is None:
+            candidates = self._dynamic.get(_first_segment(path), [])
+            for regex, route_levels in candidates + self._dynamic.get("*", []):
+                if regex.match(path):
+                    levels = route_levels
+                    break
+        if levels is not None:
+            policy = levels.get(method) or levels.get("*")
+            if policy is not None:
+                return policy
+        return default_policy(method)
+
+route_policies = RoutePolicyTable()
+
 class SecurityMiddleware:
     def __init__(self, app):
         self.app = app
     
     async def __call__(self, scope, receive, send):
-        if scope["type"] == "http":
-            request = Request(scope, receive)
-            
-            logger.info(f"Middleware - Procesando solicitud: {request.method} {request.url.path}")
-            
-            # Excluir rutas de autenticación, upload y event_requests de la validación estricta
-            if (request.url.path in ["/auth/token", "/auth/login"] or 
-                request.url.path.startswith("/upload/") or
-                request.url.path.startswith("/event-requests/")):
-                logger.info(f"Middleware - Ruta excluida de validación: {request.url.path}")
-                return await self.app(scope, receive, send)
-            
-            # Validar headers
-            logger.info("Middleware - Validando headers...")
-            if not self._validate_headers(request.headers):
-                logger.error("Middleware - Headers inválidos detectados")
-                return await self._send_error_response(send, 400, "Headers inválidos")
-            
-            # Validar query parameters
-            logger.info("Middleware - Validando query parameters...")
-            if not self._validate_query_params(request.query_params):
-                logger.error("Middleware - Query parameters inválidos detectados")
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        
+        policy = route_policies.lookup(scope["method"], scope["path"])
+        if policy == POLICY_NONE:
+            return await self.app(scope, receive, send)
+        if policy == POLICY_QUERY:
+            # Lecturas: solo hay algo que validar si traen query string
+            if scope["query_string"] and not self._validate_query_params(QueryParams(scope["query_string"])):
+                logger.error(f"Middleware - Query parameters inválidos en {scope['path']}")
                 return await self._send_error_response(send, 400, "Parámetros de consulta inválidos")
-            
-            # Para solicitudes POST/PUT, validar body
-            if request.method in ["POST", "PUT", "PATCH"]:
-                logger.info(f"Middleware - Validando body para {request.method}...")
-                try:
-                    body = await request.body()
-                    if body:
-                        logger.info(f"Middleware - Body recibido, tamaño: {len(body)} bytes")
-                        if not self._validate_request_body(body, request.headers.get("content-type", "")):
-                            logger.error("Middleware - Body inválido detectado")
-                            return await self._send_error_response(send, 400, "Contenido de solicitud inválido")
-                        logger.info("Middleware - Body validado correctamente")
-                    else:
-                        logger.info("Middleware - Body vacío")
-                except Exception as e:
-                    logger.error(f"Middleware - Error validando body de solicitud: {e}")
-                    return await self._send_error_response(send, 400, "Error procesando solicitud")
-            
-            logger.info("Middleware - Validación completada, pasando a la aplicación")
-        return await self.app(scope, receive, send)
+            return await self.app(scope, receive, send)
+        
+        request = Request(scope, receive)
+        logger.info(f"Middleware - Procesando solicitud: {request.method} {request.url.path}")
+        
+        # Validar headers
+        if not self._validate_headers(request.headers):
+            logger.error("Middleware - Headers inválidos detectados")
+            return await self._send_error_response(send, 400, "Headers inválidos")
+        
+        # Validar query parameters
+        if not self._validate_query_params(request.query_params):
+            logger.error("Middleware - Query parameters inválidos detectados")
+            return await self._send_error_response(send, 400, "Parámetros de consulta inválidos")
+        
+        content_length = request.headers.get("content-length", "")
+        if content_length.isdigit() and int(content_length) > MAX_BODY_SIZE:
+            logger.error(f"Middleware - Content-Length excede el límite: {content_length}")
+            return await self._send_error_response(send, 413, "Solicitud demasiado grande")
+        logger.info(f"Middleware - Validando body en streaming para {request.method}...")
+        return await self._call_with_body_inspection(
+            scope, receive, send, request.headers.get("content-type", "")
+        )
+    
+    async def _call_with_body_inspection(self, scope, receive, send, content_type: str):
+        """
+        Pasa la solicitud a la aplicación validando cada chunk del body cuando ésta lo
+        lee, sin acumularlo completo. JSON y formularios se leen una sola vez: el body
+        validado se entrega a la aplicación en un único mensaje con ese mismo objeto.
+        Si un chunk no es válido, la aplicación recibe http.disconnect en su lugar, su
+        respuesta se descarta y se envía el error
+        """
+        inspector = _BodyInspector(self, content_type)
+        rejection: Optional[Tuple[int, str]] = None
+        response_started = False
+        body_delivered = False
+        
+        async def inspected_receive():
+            nonlocal rejection, body_delivered
+            message = await receive()
+            while message["type"] == "http.request" and rejection is None:
+                more_body = message.get("more_body", False)
+                rejection = inspector.feed(message.get("body", b""), more_body)
+                if inspector.mode != "structured" or not more_body:
+                    break
+                message = await receive()
+            if rejection is not None:
+                return {"type": "http.disconnect"}
+            if inspector.body is not None and not body_delivered:
+                body_delivered = True
+                return {"type": "http.request", "body": inspector.body, "more_body": False}
+            return message
+        
+        async def guarded_send(message):
+            nonlocal response_started
+            if rejection is None:
+                if message["type"] == "http.response.start":
+                    response_started = True
+                await send(message)
+        
+        try:
+            await self.app(scope, inspected_receive, guarded_send)
+        except Exception:
+            if rejection is None:
+                raise
+        if rejection is not None and not response_started:
+            logger.error(f"Middleware - Body rechazado: {rejection[1]}")
+            await self._send_error_response(send, *rejection)
     
     def _validate_headers(self, headers: Dict[str, str]) -> bool:
         """
@@ -94,7 +328,7 @@ class SecurityMiddleware:
                 return False
             
             # Verificar contenido malicioso en headers (SQLi/XSS) - KEEP THIS CHECK
-            if value and (SQL_INJECTION_PATTERNS.search(value) or XSS_PATTERNS.search(value)):
+            if contains_threat(value):
                 logger.warning(f"Contenido malicioso en header {name}: {value}")
                 return False
         
@@ -107,7 +341,7 @@ class SecurityMiddleware:
         for name, value in query_params.items():
             if value:
                 # Verificar contenido malicioso
-                if SQL_INJECTION_PATTERNS.search(value) or XSS_PATTERNS.search(value):
+                if contains_threat(value):
                     logger.warning(f"Contenido malicioso en query param {name}: {value}")
                     return False
                 
@@ -126,7 +360,7 @@ class SecurityMiddleware:
             # Para multipart/form-data, no intentar decodificar como texto
             if "multipart/form-data" in content_type:
                 # Para archivos, solo verificar que no sea demasiado grande
-                if len(body) > 10 * 1024 * 1024:  # 10MB límite general
+                if len(body) > MAX_BODY_SIZE:
                     logger.warning("Body demasiado grande para multipart/form-data")
                     return False
                 return True
@@ -135,7 +369,6 @@ class SecurityMiddleware:
                 # Validar JSON
                 logger.info("Middleware - Validando JSON...")
                 data = json.loads(body.decode('utf-8'))
-                logger.info(f"Middleware - JSON decodificado: {data}")
                 result = self._validate_json_data(data)
                 logger.info(f"Middleware - Validación JSON resultado: {result}")
                 return result
@@ -146,7 +379,7 @@ class SecurityMiddleware:
             else:
                 # Para otros tipos de contenido, verificar que no contenga patrones maliciosos
                 body_str = body.decode('utf-8', errors='ignore')
-                return not (SQL_INJECTION_PATTERNS.search(body_str) or XSS_PATTERNS.search(body_str))
+                return not contains_threat(body_str)
         
         except (json.JSONDecodeError, UnicodeDecodeError) as e:
             logger.error(f"Middleware - Error decodificando body: {e}")
@@ -154,35 +387,26 @@ class SecurityMiddleware:
     
     def _validate_json_data(self, data: Any) -> bool:
         """
-        Valida datos JSON recursivamente
+        Valida datos JSON recorriéndolos con una pila en lugar de recursión
         """
-        if isinstance(data, dict):
-            logger.info(f"Middleware - Validando diccionario JSON con {len(data)} campos")
-            for key, value in data.items():
-                logger.info(f"Middleware - Validando campo: {key}")
-                if not self._validate_json_key(key) or not self._validate_json_data(value):
-                    logger.error(f"Middleware - Campo JSON inválido: {key}")
+        stack = [data]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, dict):
+                for key, value in item.items():
+                    if not self._validate_json_key(key):
+                        logger.error(f"Middleware - Campo JSON inválido: {key}")
+                        return False
+                    stack.append(value)
+            elif isinstance(item, list):
+                stack.extend(item)
+            elif isinstance(item, str):
+                if len(item) > 10000:  # Límite de 10KB por campo
+                    logger.error("Middleware - Campo JSON demasiado largo")
                     return False
-            logger.info("Middleware - Diccionario JSON válido")
-            return True # Ensure all dict items are checked before returning True
-        elif isinstance(data, list):
-            logger.info(f"Middleware - Validando lista JSON con {len(data)} elementos")
-            for item in data:
-                if not self._validate_json_data(item):
-                    logger.error("Middleware - Elemento de lista JSON inválido")
+                if contains_threat(item):
+                    logger.error(f"Middleware - Contenido malicioso en JSON: {item[:100]}")
                     return False
-            logger.info("Middleware - Lista JSON válida")
-            return True # Ensure all list items are checked before returning True
-        elif isinstance(data, str):
-            logger.info(f"Middleware - Validando string JSON: {data[:50]}...")
-            if SQL_INJECTION_PATTERNS.search(data) or XSS_PATTERNS.search(data):
-                logger.error(f"Middleware - Contenido malicioso en JSON: {data}")
-                return False
-            if len(data) > 10000:  # Límite de 10KB por campo
-                logger.error("Middleware - Campo JSON demasiado largo")
-                return False
-            logger.info("Middleware - String JSON válido")
-        
         return True
     
     def _validate_json_key(self, key: str) -> bool:
@@ -192,7 +416,7 @@ class SecurityMiddleware:
         if not key or len(key) > 100:
             return False
         
-        if SQL_INJECTION_PATTERNS.search(key) or XSS_PATTERNS.search(key):
+        if contains_threat(key):
             logger.warning(f"Clave JSON maliciosa: {key}")
             return False
         
@@ -206,14 +430,14 @@ class SecurityMiddleware:
             if '=' in line:
                 key, value = line.split('=', 1)
                 # It's better to validate the value separately, not combine with key validation here
-                if SQL_INJECTION_PATTERNS.search(value) or XSS_PATTERNS.search(value):
+                if contains_threat(value):
                     logger.warning(f"Form data malicioso: {line}")
                     return False
                 if not self._validate_json_key(key): # Re-use key validation for form keys
                     logger.warning(f"Clave de formulario maliciosa: {key}")
                     return False
             else: # Handle cases where there's no '=' (e.g., just a key)
-                if SQL_INJECTION_PATTERNS.search(line) or XSS_PATTERNS.search(line):
+                if contains_threat(line):
                     logger.warning(f"Form data malicioso (no key=value format): {line}")
                     return False
                 if len(line) > 1000: # Limit length for standalone values/keys
@@ -235,6 +459,41 @@ class SecurityMiddleware:
         await send({"type": "http.response.body", "body": response.body})
 
 
+class RequestLoggingMiddleware:
+    """
+    Registra método, path, origin, status y duración de cada solicitud HTTP. Es ASGI
+    puro: solo observa el mensaje http.response.start, sin envolver ni acumular la respuesta
+    """
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        
+        start_time = time.perf_counter()
+        status_code = None
+        
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_with_status)
+        except Exception as e:
+            logger.error(f"Excepción procesando {scope['method']} {scope['path']}: {e}", exc_info=True)
+            raise
+        finally:
+            elapsed_ms = (time.perf_counter() - start_time) * 1000
+            origin = next((value for name, value in scope["headers"] if name == b"origin"), b"-").decode("latin-1")
+            logger.info(
+                f"{scope['method']} {scope['path']} -> {status_code} "
+                f"({elapsed_ms:.1f} ms, origin: {origin})"
+            )
+
+
 # Your add_security_middleware function in app/main.py or wherever you initialize your app
 # should use this.
 # Example:
@@ -252,4 +511,6 @@ def add_security_middleware(app):
     Agrega middleware de seguridad a la aplicación
     """
     app.add_middleware(SecurityMiddleware) # Assuming SecurityMiddleware is now an actual Starlette BaseHTTPMiddleware or similar
+    # Las rutas se incluyen después de agregar el middleware: la tabla se compila al arrancar
+    app.add_event_handler("startup", lambda: route_policies.compile(app.routes))
     return app
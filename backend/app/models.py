@@ -1,9 +1,32 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, Float
+from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, Float, Index, Computed, DDL, ForeignKey, event
+from sqlalchemy.orm import relationship, deferred
 from sqlalchemy.sql import func
 from .database import Base
 from datetime import datetime
 from sqlalchemy.dialects import postgresql
 
+# Configuración de búsqueda de texto: stemming en español ignorando acentos
+SEARCH_CONFIG = "spanish_unaccent"
+
+EVENT_SEARCH_VECTOR_SQL = (
+    f"setweight(to_tsvector('{SEARCH_CONFIG}'::regconfig, coalesce(name, '')), 'A') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}'::regconfig, coalesce(artist, '')), 'A') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}'::regconfig, coalesce(description, '')), 'C')"
+)
+
+CREATE_SEARCH_CONFIG_SQL = f"""
+CREATE EXTENSION IF NOT EXISTS unaccent;
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = '{SEARCH_CONFIG}') THEN
+        CREATE TEXT SEARCH CONFIGURATION {SEARCH_CONFIG} (COPY = spanish);
+        ALTER TEXT SEARCH CONFIGURATION {SEARCH_CONFIG}
+            ALTER MAPPING FOR hword, hword_part, word WITH unaccent, spanish_stem;
+    END IF;
+END
+$$;
+"""
+
 class Event(Base):
     __tablename__ = "events"
 
@@ -25,6 +48,35 @@ class Event(Base):
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
     date_types = Column(postgresql.ARRAY(String), nullable=True)
     ticket_price = Column(Integer, nullable=True)
+    # Venue asociado; venue, location, city, latitude y longitude replican sus datos
+    venue_id = Column(Integer, ForeignKey("venues.id", ondelete="SET NULL"), nullable=True, index=True)
+    venue_ref = relationship("Venue")
+    # Mantenida por Postgres a partir de name, artist y description
+    search_vector = deferred(Column(postgresql.TSVECTOR, Computed(EVENT_SEARCH_VECTOR_SQL, persisted=True)))
+
+    __table_args__ = (
+        # Orden estable (date, id) usado por la paginación por cursor
+        Index("ix_events_date_id", "date", "id"),
+        # Índices compuestos para los filtros de agenda más comunes
+        Index("ix_events_city_date", "city", "date"),
+        Index("ix_events_genre_date", "genre", "date"),
+        Index("ix_events_search_vector", "search_vector", postgresql_using="gin"),
+        # Índice GIN para los filtros de date_types (@> y &&)
+        Index("ix_events_date_types", "date_types", postgresql_using="gin"),
+        # Prefiltro por bounding box de las búsquedas por cercanía
+        Index("ix_events_lat_lng", "latitude", "longitude"),
+        # Próximos eventos del mismo artista / venue en el detalle de un evento
+        Index("ix_events_artist_date", "artist", "date"),
+        Index("ix_events_venue_id_date", "venue_id", "date"),
+        # Índices trigram para las sugerencias de búsqueda (typeahead)
+        Index("ix_events_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+        Index("ix_events_artist_trgm", "artist", postgresql_using="gin", postgresql_ops={"artist": "gin_trgm_ops"}),
+        Index("ix_events_venue_trgm", "venue", postgresql_using="gin", postgresql_ops={"venue": "gin_trgm_ops"}),
+    )
+
+# create_all necesita la configuración de búsqueda antes de crear la columna generada
+event.listen(Event.__table__, "before_create", DDL(CREATE_SEARCH_CONFIG_SQL))
+event.listen(Event.__table__, "before_create", DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
 
 class User(Base):
     __tablename__ = "users"
@@ -65,4 +117,9 @@ class Venue(Base):
     location = Column(String, nullable=True)  # Campo adicional para ubicación descriptiva
     city = Column(String, index=True, nullable=True)
     created_at = Column(DateTime, default=func.now())
-    updated_at = Column(DateTime, default=func.now(), onupdate=func.now()) 
\ No newline at end of file
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        # Prefiltro por bounding box de las búsquedas por cercanía
+        Index("ix_venues_lat_lng", "latitude", "longitude"),
+    )
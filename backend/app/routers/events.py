@@ -1,9 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, Request, Body, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, Body, UploadFile, File, Form
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from datetime import date
+from datetime import date, datetime
 import logging
+import math
 from .. import crud, schemas, models, database, auth
+from ..cache import response_cache, get_catalog_version
+from ..etag import check_not_modified
 from ..s3_service import s3_service
 
 # Configurar logging
@@ -14,10 +17,37 @@ router = APIRouter(
     tags=["events"]
 )
 
+# Expansiones admitidas por include= en GET /events/{event_id}
+EVENT_DETAIL_INCLUDES = {"venue", "related"}
+
+def _list_events_cached(db: Session, **filters):
+    """
+    Lista eventos usando response_cache, con clave (versión del catálogo, filtros normalizados)
+    """
+    if filters.get("search"):
+        filters["search"] = " ".join(filters["search"].split())[:100]
+    if filters.get("date_types"):
+        filters["date_types"] = sorted(set(filters["date_types"]))
+    key = ("events", get_catalog_version()) + tuple(
+        (name, tuple(value) if isinstance(value, list) else value)
+        for name, value in sorted(filters.items())
+    )
+    if filters.get("cursor") and not filters.get("search"):
+        # Validar el cursor antes de consultar (con búsqueda se ignora): los errores del
+        # cargador no son del cliente
+        try:
+            crud.decode_cursor(filters["cursor"])
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    return response_cache.get_or_set(
+        key, lambda: schemas.EventList.model_validate(crud.get_events(db, **filters), from_attributes=True)
+    )
+
 # IMPORTANTE: Añadimos esta ruta explícita para asegurarnos de que GET /events funcione
 @router.get("", response_model=schemas.EventList)  # Sin barra al principio
 def read_events_root(
     request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 12,  # Cambiado a 12 para coincidir con el frontend
     genre: Optional[str] = None,
@@ -27,19 +57,25 @@ def read_events_root(
     date_to: Optional[date] = Query(None, alias="date_to"),
     search: Optional[str] = None,
     date_types: Optional[List[str]] = Query(None, alias="date_types"),
+    date_types_match: schemas.DateTypesMatch = Query("all", description="Match all or any of date_types"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor returned as nextCursor by the previous page"),
+    include_total: schemas.TotalMode = Query("false", description="Total count: false, exact or estimate"),
     db: Session = Depends(database.get_db)
 ):
     """
     Get events with filtering options (route without leading slash)
     """
     logger.info(f"GET /events request received (root route)")
-    logger.info(f"Query params: skip={skip}, limit={limit}, genre={genre}, city={city}, date={date}, date_from={date_from}, date_to={date_to}, date_types={date_types}")
+    logger.info(f"Query params: skip={skip}, limit={limit}, genre={genre}, city={city}, date={date}, date_from={date_from}, date_to={date_to}, date_types={date_types}, date_types_match={date_types_match}, cursor={cursor}")
     logger.info(f"Headers: {dict(request.headers)}")
+    not_modified = check_not_modified(request, response, db, models.Event)
+    if not_modified:
+        return not_modified
     # Si se proporciona una fecha específica, usarla como date_from y date_to
     if date:
         date_from = date
         date_to = date
-    events = crud.get_events(
+    return _list_events_cached(
         db, 
         skip=skip, 
         limit=limit, 
@@ -48,13 +84,16 @@ def read_events_root(
         date_from=date_from,
         date_to=date_to,
         search=search,
-        date_types=date_types
+        date_types=date_types,
+        date_types_match=date_types_match,
+        cursor=cursor,
+        include_total=include_total
     )
-    return events
 
 @router.get("/", response_model=schemas.EventList)
 def read_events(
     request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 12,  # Cambiado a 12 para coincidir con el frontend
     genre: Optional[str] = None,
@@ -64,19 +103,25 @@ def read_events(
     date_to: Optional[date] = Query(None, alias="date_to"),
     search: Optional[str] = None,
     date_types: Optional[List[str]] = Query(None, alias="date_types"),
+    date_types_match: schemas.DateTypesMatch = Query("all", description="Match all or any of date_types"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor returned as nextCursor by the previous page"),
+    include_total: schemas.TotalMode = Query("false", description="Total count: false, exact or estimate"),
     db: Session = Depends(database.get_db)
 ):
     """
     Get events with filtering options
     """
     logger.info(f"GET /events/ request received (with trailing slash)")
-    logger.info(f"Query params: skip={skip}, limit={limit}, genre={genre}, city={city}, date={date}, date_from={date_from}, date_to={date_to}, date_types={date_types}")
+    logger.info(f"Query params: skip={skip}, limit={limit}, genre={genre}, city={city}, date={date}, date_from={date_from}, date_to={date_to}, date_types={date_types}, date_types_match={date_types_match}, cursor={cursor}")
     logger.info(f"Headers: {dict(request.headers)}")
+    not_modified = check_not_modified(request, response, db, models.Event)
+    if not_modified:
+        return not_modified
     # Si se proporciona una fecha específica, usarla como date_from y date_to
     if date:
         date_from = date
         date_to = date
-    events = crud.get_events(
+    return _list_events_cached(
         db, 
         skip=skip, 
         limit=limit, 
@@ -85,25 +130,31 @@ def read_events(
         date_from=date_from,
         date_to=date_to,
         search=search,
-        date_types=date_types
+        date_types=date_types,
+        date_types_match=date_types_match,
+        cursor=cursor,
+        include_total=include_total
     )
-    return events
 
-@router.get("/nearby", response_model=schemas.EventList)
+@router.get("/nearby", response_model=schemas.NearbyEventList)
 def get_nearby_events(
     request: Request,
+    response: Response,
     lat: float = Query(..., description="Latitude of the user's location"),
     lng: float = Query(..., description="Longitude of the user's location"),
     radius: float = Query(100, description="Search radius in kilometers"),
+    k: Optional[int] = Query(None, ge=1, le=100, description="Return the k nearest events instead of a radius search"),
     skip: int = 0,
     limit: int = 12,
+    include_total: schemas.TotalMode = Query("false", description="Total count: false, exact or estimate"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor returned as nextCursor by the previous page"),
     db: Session = Depends(database.get_db)
 ):
     """
-    Get events within a certain radius of given coordinates
+    Get events within a certain radius of given coordinates, or the k nearest ones
     """
     logger.info(f"GET /events/nearby request received")
-    logger.info(f"Query params: lat={lat}, lng={lng}, radius={radius}, skip={skip}, limit={limit}")
+    logger.info(f"Query params: lat={lat}, lng={lng}, radius={radius}, k={k}, skip={skip}, limit={limit}")
     logger.info(f"Headers: {dict(request.headers)}")
     
     # Validate coordinates
@@ -114,24 +165,222 @@ def get_nearby_events(
     if radius <= 0:
         raise HTTPException(status_code=400, detail="Radius must be positive")
     
-    events = crud.get_nearby_events(
+    not_modified = check_not_modified(request, response, db, models.Event, date_dependent=True)
+    if not_modified:
+        return not_modified
+    
+    if k is not None:
+        return crud.get_nearest_events(db, lat=lat, lng=lng, k=k)
+    
+    if cursor:
+        # Validar el cursor antes de consultar: los demás ValueError (p. ej. de pydantic)
+        # no son del cliente
+        try:
+            crud.decode_distance_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    return crud.get_nearby_events(
         db,
         lat=lat,
         lng=lng,
         radius=radius,
         skip=skip,
-        limit=limit
+        limit=limit,
+        include_total=include_total,
+        cursor=cursor
+    )
+
+@router.get("/map", response_model=schemas.EventMap)
+def get_event_map(
+    request: Request,
+    response: Response,
+    bbox: str = Query(..., description="min_lng,min_lat,max_lng,max_lat"),
+    zoom: int = Query(..., ge=0, le=22),
+    db: Session = Depends(database.get_db)
+):
+    """
+    Server-side clusters of upcoming events for a map viewport, or minimal markers at high zoom
+    """
+    logger.info(f"GET /events/map request received: bbox={bbox}, zoom={zoom}")
+    try:
+        min_lng, min_lat, max_lng, max_lat = (float(value) for value in bbox.split(","))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="bbox must be min_lng,min_lat,max_lng,max_lat")
+    if not (-90 <= min_lat < max_lat <= 90) or not (-180 <= min_lng < max_lng <= 180):
+        raise HTTPException(status_code=400, detail="Invalid bbox")
+    
+    not_modified = check_not_modified(request, response, db, models.Event, date_dependent=True)
+    if not_modified:
+        return not_modified
+    
+    # Ajustar el bbox a la grilla de celdas para que viewports cercanos compartan caché
+    cell = crud.map_cell_size(zoom)
+    tile = (
+        max(math.floor(min_lat / cell) * cell, -90.0),
+        max(math.floor(min_lng / cell) * cell, -180.0),
+        min(math.ceil(max_lat / cell) * cell, 90.0),
+        min(math.ceil(max_lng / cell) * cell, 180.0),
+    )
+    return response_cache.get_or_set(
+        ("map", get_catalog_version(), date.today(), zoom) + tile,
+        lambda: schemas.EventMap.model_validate(crud.get_event_map(db, *tile, zoom=zoom))
+    )
+
+@router.get("/calendar", response_model=schemas.EventCalendar)
+def get_event_calendar(
+    request: Request,
+    response: Response,
+    month: str = Query(..., description="Month to show, as YYYY-MM"),
+    city: Optional[str] = None,
+    genre: Optional[str] = None,
+    db: Session = Depends(database.get_db)
+):
+    """
+    Per-day event counts for a calendar month view
+    """
+    logger.info(f"GET /events/calendar request received: month={month}, city={city}, genre={genre}")
+    try:
+        month_start = datetime.strptime(month, "%Y-%m").date()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="month must be YYYY-MM")
+    
+    not_modified = check_not_modified(request, response, db, models.Event)
+    if not_modified:
+        return not_modified
+    
+    return response_cache.get_or_set(
+        ("calendar", get_catalog_version(), month_start, city or None, genre or None),
+        lambda: schemas.EventCalendar.model_validate(
+            crud.get_event_calendar(db, month_start, city=city, genre=genre)
+        )
+    )
+
+@router.get("/suggest", response_model=schemas.EventSuggestions)
+def suggest_events(
+    q: str = Query(..., min_length=2, max_length=100, description="Text typed in the search box"),
+    limit: int = Query(5, ge=1, le=10, description="Max suggestions per group"),
+    db: Session = Depends(database.get_db)
+):
+    """
+    Typeahead suggestions: distinct artists, venues and event names matching q
+    """
+    logger.info(f"GET /events/suggest request received: q={q}, limit={limit}")
+    return crud.get_event_suggestions(db, q=q, limit=limit)
+
+def _get_facets_cached(db: Session, **filters) -> schemas.EventFacets:
+    """
+    Conteos por faceta usando response_cache; sin filtros se comparte con
+    /filters/genres y /filters/cities
+    """
+    if filters.get("date_types"):
+        filters["date_types"] = sorted(set(filters["date_types"]))
+    else:
+        filters.pop("date_types_match", None)
+    key = ("facets", get_catalog_version()) + tuple(
+        (name, tuple(value) if isinstance(value, list) else value)
+        for name, value in sorted(filters.items()) if value
+    )
+    return response_cache.get_or_set(
+        key, lambda: schemas.EventFacets.model_validate(crud.get_event_facets(db, **filters))
     )
-    return events
 
-@router.get("/{event_id}", response_model=schemas.Event)
-def read_event(event_id: int, db: Session = Depends(database.get_db)):
+@router.get("/facets", response_model=schemas.EventFacets)
+def get_facets(
+    request: Request,
+    response: Response,
+    genre: Optional[str] = None,
+    city: Optional[str] = None,
+    date_from: Optional[date] = Query(None, alias="date_from"),
+    date_to: Optional[date] = Query(None, alias="date_to"),
+    search: Optional[str] = None,
+    date_types: Optional[List[str]] = Query(None, alias="date_types"),
+    date_types_match: schemas.DateTypesMatch = Query("all", description="Match all or any of date_types"),
+    db: Session = Depends(database.get_db)
+):
     """
-    Get a specific event by ID
+    Genre, city and date_type counts for the applied filters, in one grouped query
     """
-    logger.info(f"GET /events/{event_id} request received")
+    logger.info(f"GET /events/facets request received")
+    
+    not_modified = check_not_modified(request, response, db, models.Event)
+    if not_modified:
+        return not_modified
     
-    db_event = crud.get_event(db, event_id=event_id)
+    return _get_facets_cached(
+        db,
+        genre=genre,
+        city=city,
+        date_from=date_from,
+        date_to=date_to,
+        search=search,
+        date_types=date_types,
+        date_types_match=date_types_match
+    )
+
+def _event_or_none(db_event):
+    return schemas.Event.model_validate(db_event, from_attributes=True) if db_event is not None else None
+
+@router.get("/cache/stats")
+def get_cache_stats(current_user: models.User = Depends(auth.get_current_admin_user)):
+    """
+    Hit/miss counters of the public events response cache (admin only)
+    """
+    return {"catalog_version": get_catalog_version(), "response_cache": response_cache.stats()}
+
+def _event_detail_or_none(detail: Optional[dict], includes: set) -> Optional[schemas.EventDetail]:
+    if detail is None:
+        return None
+    extras = {}
+    if "venue" in includes:
+        venue = detail["venue_details"]
+        extras["venue_details"] = schemas.Venue.model_validate(venue, from_attributes=True) if venue else None
+    if "related" in includes:
+        for key in ("more_by_artist", "more_at_venue"):
+            extras[key] = [schemas.Event.model_validate(event, from_attributes=True) for event in detail[key]]
+    event = schemas.Event.model_validate(detail["event"], from_attributes=True)
+    return schemas.EventDetail(**event.model_dump(), **extras)
+
+@router.get("/{event_id}", response_model=schemas.EventDetail, response_model_exclude_unset=True)
+def read_event(
+    event_id: int,
+    request: Request,
+    response: Response,
+    include: Optional[str] = Query(None, description="Comma-separated expansions: venue, related"),
+    related_limit: int = Query(4, ge=1, le=20, description="Max related events per group"),
+    db: Session = Depends(database.get_db)
+):
+    """
+    Get a specific event by ID, optionally with its venue and related upcoming events
+    """
+    logger.info(f"GET /events/{event_id} request received (include={include})")
+    
+    includes = {part.strip() for part in include.split(",") if part.strip()} if include else set()
+    if includes - EVENT_DETAIL_INCLUDES:
+        raise HTTPException(status_code=400, detail=f"include must be a subset of {sorted(EVENT_DETAIL_INCLUDES)}")
+    
+    not_modified = check_not_modified(request, response, db, models.Event, date_dependent="related" in includes)
+    if not_modified:
+        return not_modified
+    
+    if includes:
+        db_event = response_cache.get_or_set(
+            ("event_detail", get_catalog_version(), date.today(), event_id, tuple(sorted(includes)), related_limit),
+            lambda: _event_detail_or_none(
+                crud.get_event_detail(
+                    db,
+                    event_id,
+                    include_venue="venue" in includes,
+                    include_related="related" in includes,
+                    related_limit=related_limit
+                ),
+                includes
+            )
+        )
+    else:
+        db_event = response_cache.get_or_set(
+            ("event", get_catalog_version(), event_id),
+            lambda: _event_or_none(crud.get_event(db, event_id=event_id))
+        )
     if db_event is None:
         raise HTTPException(status_code=404, detail="Event not found")
     return db_event
@@ -152,6 +401,9 @@ def create_event_root(
         result = crud.create_event(db=db, event=event)
         logger.info(f"Event created successfully: {result.id if result else None}")
         return result
+    except ValueError as e:
+        # Por ejemplo, venue_id inexistente
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Exception in create_event_root: {e}", exc_info=True)
         raise
@@ -172,6 +424,9 @@ def create_event(
         result = crud.create_event(db=db, event=event)
         logger.info(f"Event created successfully: {result.id if result else None}")
         return result
+    except ValueError as e:
+        # Por ejemplo, venue_id inexistente
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Exception in create_event: {e}", exc_info=True)
         raise
@@ -197,6 +452,9 @@ def update_event(
             raise HTTPException(status_code=404, detail="Event not found")
         logger.info(f"Event updated successfully: {event_id}")
         return db_event
+    except ValueError as e:
+        # Por ejemplo, venue_id inexistente
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Exception in update_event: {e}", exc_info=True)
         raise
@@ -283,24 +541,30 @@ async def delete_events_bulk(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/filters/genres", response_model=List[str])
-def get_genres(db: Session = Depends(database.get_db)):
+def get_genres(request: Request, response: Response, db: Session = Depends(database.get_db)):
     """
     Get all available genres
     """
     logger.info(f"GET /events/filters/genres request received")
     
-    genre_rows = crud.get_genres(db)
-    return [genre[0] for genre in genre_rows]
+    not_modified = check_not_modified(request, response, db, models.Event)
+    if not_modified:
+        return not_modified
+    
+    return sorted(facet.value for facet in _get_facets_cached(db).genres)
 
 @router.get("/filters/cities", response_model=List[str])
-def get_cities(db: Session = Depends(database.get_db)):
+def get_cities(request: Request, response: Response, db: Session = Depends(database.get_db)):
     """
     Get all available cities
     """
     logger.info(f"GET /events/filters/cities request received")
     
-    city_rows = crud.get_cities(db)
-    return [city[0] for city in city_rows]
+    not_modified = check_not_modified(request, response, db, models.Event)
+    if not_modified:
+        return not_modified
+    
+    return sorted(facet.value for facet in _get_facets_cached(db).cities)
 
 @router.post("/with-image", response_model=schemas.Event)
 async def create_event_with_image(
@@ -318,6 +582,7 @@ async def create_event_with_image(
     longitude: Optional[float] = Form(None),
     date_types: Optional[str] = Form(None),  # Se recibirá como string JSON
     ticket_price: Optional[int] = Form(None),
+    venue_id: Optional[int] = Form(None),
     image: Optional[UploadFile] = File(None),
     db: Session = Depends(database.get_db),
     current_user: models.User = Depends(auth.get_current_admin_user)
@@ -360,7 +625,8 @@ async def create_event_with_image(
             latitude=latitude,
             longitude=longitude,
             date_types=parsed_date_types,
-            ticket_price=ticket_price
+            ticket_price=ticket_price,
+            venue_id=venue_id
         )
         
         # Subir imagen si se proporciona
@@ -405,6 +671,8 @@ async def create_event_with_image(
         
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error creating event with image: {e}")
         raise HTTPException(
@@ -429,6 +697,7 @@ async def update_event_with_image(
     longitude: Optional[float] = Form(None),
     date_types: Optional[str] = Form(None),
     ticket_price: Optional[int] = Form(None),
+    venue_id: Optional[int] = Form(None),
     image: Optional[UploadFile] = File(None),
     db: Session = Depends(database.get_db),
     current_user: models.User = Depends(auth.get_current_admin_user)
@@ -479,6 +748,9 @@ async def update_event_with_image(
             date_types=parsed_date_types,
             ticket_price=ticket_price
         )
+        # Solo cambiar el venue asociado si se envía explícitamente
+        if venue_id is not None:
+            event_data.venue_id = venue_id
         
         # Subir nueva imagen si se proporciona
         if image:
@@ -525,6 +797,8 @@ async def update_event_with_image(
         
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error updating event with image: {e}")
         raise HTTPException(
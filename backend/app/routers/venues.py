@@ -1,7 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from .. import crud, schemas
+from .. import crud, schemas, models
+from ..etag import check_not_modified
 from ..database import get_db
 from ..auth import get_current_admin_user
 
@@ -9,18 +10,41 @@ router = APIRouter()
 
 @router.get("/venues/", response_model=schemas.VenueList)
 def read_venues(
+    request: Request,
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     city: Optional[str] = Query(None),
     search: Optional[str] = Query(None),
+    include_total: schemas.TotalMode = Query("false"),
     db: Session = Depends(get_db)
 ):
     """Get list of venues with optional filtering"""
-    return crud.get_venues(db, skip=skip, limit=limit, city=city, search=search)
+    not_modified = check_not_modified(request, response, db, models.Venue)
+    if not_modified:
+        return not_modified
+    return crud.get_venues(db, skip=skip, limit=limit, city=city, search=search, include_total=include_total)
+
+@router.get("/venues/nearby", response_model=schemas.NearbyVenueList)
+def read_nearby_venues(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    radius: Optional[float] = Query(None, gt=0, description="Search radius in kilometers"),
+    k: Optional[int] = Query(None, ge=1, le=100, description="Return the k nearest venues instead"),
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db)
+):
+    """Get venues near a point, by radius or k nearest"""
+    if (radius is None) == (k is None):
+        raise HTTPException(status_code=400, detail="Provide exactly one of radius or k")
+    return crud.get_nearby_venues(db, lat=lat, lng=lng, radius=radius, k=k, limit=limit)
 
 @router.get("/venues/{venue_id}", response_model=schemas.Venue)
-def read_venue(venue_id: int, db: Session = Depends(get_db)):
+def read_venue(venue_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
     """Get a specific venue by ID"""
+    not_modified = check_not_modified(request, response, db, models.Venue)
+    if not_modified:
+        return not_modified
     venue = crud.get_venue(db, venue_id=venue_id)
     if venue is None:
         raise HTTPException(status_code=404, detail="Venue not found")
@@ -61,8 +85,11 @@ def delete_venue(
     return {"message": "Venue deleted successfully"}
 
 @router.get("/venues/cities/")
-def get_venue_cities(db: Session = Depends(get_db)):
+def get_venue_cities(request: Request, response: Response, db: Session = Depends(get_db)):
     """Get list of all cities that have venues"""
+    not_modified = check_not_modified(request, response, db, models.Venue)
+    if not_modified:
+        return not_modified
     cities = crud.get_venue_cities(db)
     return {"cities": [city[0] for city in cities if city[0]]}
 
@@ -1,8 +1,14 @@
 from pydantic import BaseModel, HttpUrl, validator, Field
-from datetime import datetime
-from typing import Optional, List, Union
+from datetime import datetime, date
+from typing import Optional, List, Union, Literal
 import re
 
+# Modo de cálculo del total en los listados: sin total, exacto o estimado por el planner
+TotalMode = Literal["false", "exact", "estimate"]
+
+# Coincidencia de date_types: todas las características seleccionadas o alguna de ellas
+DateTypesMatch = Literal["all", "any"]
+
 class EventBase(BaseModel):
     name: str
     artist: str
@@ -19,6 +25,7 @@ class EventBase(BaseModel):
     longitude: Optional[float] = None
     date_types: Optional[List[str]] = None
     ticket_price: Optional[int] = None
+    venue_id: Optional[int] = None
 
 class EventCreate(EventBase):
     pass
@@ -39,6 +46,7 @@ class EventUpdate(BaseModel):
     longitude: Optional[float] = None
     date_types: Optional[List[str]] = None
     ticket_price: Optional[int] = None
+    venue_id: Optional[int] = None
 
 class Event(EventBase):
     id: int
@@ -48,14 +56,73 @@ class Event(EventBase):
     class Config:
         orm_mode = True
 
+class EventDetail(Event):
+    venue_details: Optional["Venue"] = None
+    more_by_artist: Optional[List[Event]] = None
+    more_at_venue: Optional[List[Event]] = None
+
 class EventList(BaseModel):
     items: List[Event]
-    total: int
+    total: Optional[int] = None
     hasMore: bool
+    nextCursor: Optional[str] = None
 
     class Config:
         orm_mode = True
 
+class NearbyEvent(Event):
+    distance: float  # km
+
+class NearbyEventList(BaseModel):
+    items: List[NearbyEvent]
+    total: Optional[int] = None
+    hasMore: bool
+    nextCursor: Optional[str] = None
+
+    class Config:
+        orm_mode = True
+
+class MapCluster(BaseModel):
+    count: int
+    latitude: float
+    longitude: float
+
+class MapMarker(BaseModel):
+    id: int
+    name: str
+    artist: str
+    venue: str
+    date: datetime
+    latitude: float
+    longitude: float
+
+class EventMap(BaseModel):
+    zoom: int
+    clusters: List[MapCluster]
+    markers: List[MapMarker]
+
+class EventSuggestions(BaseModel):
+    artists: List[str]
+    venues: List[str]
+    names: List[str]
+
+class FacetCount(BaseModel):
+    value: str
+    count: int
+
+class EventFacets(BaseModel):
+    genres: List[FacetCount]
+    cities: List[FacetCount]
+    date_types: List[FacetCount]
+
+class CalendarDay(BaseModel):
+    date: date
+    count: int
+
+class EventCalendar(BaseModel):
+    month: str  # YYYY-MM
+    days: List[CalendarDay]
+
 class BulkDeleteRequest(BaseModel):
     event_ids: List[int]
 
@@ -250,7 +317,21 @@ class Venue(VenueBase):
 
 class VenueList(BaseModel):
     items: List[Venue]
-    total: int
+    total: Optional[int] = None
+    hasMore: bool = False
 
     class Config:
-        orm_mode = True 
\ No newline at end of file
+        orm_mode = True
+
+class NearbyVenue(Venue):
+    distance: float  # km
+
+class NearbyVenueList(BaseModel):
+    items: List[NearbyVenue]
+    total: Optional[int] = None
+    hasMore: bool = False
+
+    class Config:
+        orm_mode = True
+
+EventDetail.model_rebuild()
@@ -0,0 +1,148 @@
+"""
+Índices espaciales en memoria de los próximos eventos y de los venues con coordenadas
+"""
+from threading import RLock
+from typing import Dict, Iterable, List, Optional, Tuple, Type
+from pydantic import BaseModel
+from datetime import datetime
+import logging
+import os
+import time
+import numpy as np
+from . import schemas
+from .geo import bounding_box, haversine_np
+
+logger = logging.getLogger(__name__)
+
+# "memory" responde las búsquedas por cercanía con estos índices; "sql" usa siempre la consulta Haversine
+NEARBY_ENGINE = os.getenv("NEARBY_ENGINE", "memory")
+
+class SpatialIndex:
+    """
+    Filas con coordenadas como arrays contiguos ordenados por latitud: la franja del
+    bounding box se ubica con searchsorted y las distancias se calculan vectorizadas.
+    Cada fila se guarda validada con schema; con date_field las consultas pueden
+    descartar filas anteriores a una fecha. Se reconstruye completo cada max_age
+    segundos (para ver escrituras de otros workers) y se actualiza de forma
+    incremental con las escrituras de este proceso
+    """
+    def __init__(self, schema: Type[BaseModel], date_field: Optional[str] = None, max_age: float = 60):
+        self.schema = schema
+        self.date_field = date_field
+        self.max_age = max_age
+        self._entries: Dict[int, Tuple[float, float, BaseModel]] = {}
+        self._arrays: Optional[tuple] = None
+        self._built_at: Optional[float] = None
+        self._lock = RLock()
+
+    def is_stale(self) -> bool:
+        return self._built_at is None or time.monotonic() - self._built_at > self.max_age
+
+    def invalidate(self) -> None:
+        """
+        Fuerza una reconstrucción completa en la próxima consulta
+        """
+        self._built_at = None
+
+    def rebuild(self, events: Iterable) -> None:
+        with self._lock:
+            self._entries.clear()
+            for event in events:
+                self._add(event)
+            self._arrays = None
+            self._built_at = time.monotonic()
+        logger.info(f"SpatialIndex({self.schema.__name__}) - reconstruido con {len(self._entries)} filas")
+
+    def _add(self, row) -> None:
+        if row.latitude is None or row.longitude is None:
+            return
+        self._entries[row.id] = (
+            row.latitude, row.longitude, self.schema.model_validate(row, from_attributes=True)
+        )
+
+    def upsert(self, row) -> None:
+        with self._lock:
+            self._entries.pop(row.id, None)
+            self._add(row)
+            self._arrays = None
+
+    def remove(self, row_id: int) -> None:
+        with self._lock:
+            if self._entries.pop(row_id, None) is not None:
+                self._arrays = None
+
+    def _get_arrays(self) -> tuple:
+        """
+        (lats, lngs, ids, dates, rows) ordenados por latitud; se regeneran tras cada cambio.
+        dates es None si el índice no tiene date_field
+        """
+        if self._arrays is None:
+            entries = sorted(self._entries.values(), key=lambda entry: entry[0])
+            rows = [entry[2] for entry in entries]
+            dates = None
+            if self.date_field:
+                dates = np.array([getattr(row, self.date_field) for row in rows], dtype="datetime64[us]")
+            self._arrays = (
+                np.array([entry[0] for entry in entries], dtype=np.float64),
+                np.array([entry[1] for entry in entries], dtype=np.float64),
+                np.array([row.id for row in rows], dtype=np.int64),
+                dates,
+                rows,
+            )
+        return self._arrays
+
+    def query_radius(
+        self, lat: float, lng: float, radius: float, since: Optional[datetime] = None
+    ) -> List[Tuple[float, BaseModel]]:
+        """
+        Filas a radius km o menos (y con fecha >= since si se indica), ordenadas por (distancia, id)
+        """
+        with self._lock:
+            lats, lngs, ids, dates, rows = self._get_arrays()
+        
+        min_lat, max_lat, min_lng, max_lng = bounding_box(lat, lng, radius)
+        start = int(np.searchsorted(lats, min_lat, side="left"))
+        stop = int(np.searchsorted(lats, max_lat, side="right"))
+        positions = np.arange(start, stop)
+        
+        mask = np.ones(stop - start, dtype=bool)
+        if since is not None and dates is not None:
+            mask &= dates[start:stop] >= np.datetime64(since, "us")
+        if min_lng is not None:
+            band_lngs = lngs[start:stop]
+            mask &= (band_lngs >= min_lng) & (band_lngs <= max_lng)
+        positions = positions[mask]
+        
+        distances = haversine_np(lat, lng, lats[positions], lngs[positions])
+        inside = distances <= radius
+        positions, distances = positions[inside], distances[inside]
+        order = np.lexsort((ids[positions], distances))
+        return [(float(distances[k]), rows[positions[k]]) for k in order]
+
+    def query_nearest(
+        self, lat: float, lng: float, k: int, since: Optional[datetime] = None
+    ) -> List[Tuple[float, BaseModel]]:
+        """
+        Las k filas más cercanas (con fecha >= since si se indica), ordenadas por (distancia, id)
+        """
+        with self._lock:
+            lats, lngs, ids, dates, rows = self._get_arrays()
+        
+        if since is not None and dates is not None:
+            positions = np.flatnonzero(dates >= np.datetime64(since, "us"))
+        else:
+            positions = np.arange(len(rows))
+        distances = haversine_np(lat, lng, lats[positions], lngs[positions])
+        if k < len(positions):
+            # Quedarse con los que no superan la k-ésima distancia (incluye empates)
+            kth = np.partition(distances, k - 1)[k - 1]
+            nearest = distances <= kth
+            positions, distances = positions[nearest], distances[nearest]
+        order = np.lexsort((ids[positions], distances))[:k]
+        return [(float(distances[i]), rows[positions[i]]) for i in order]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+event_spatial_index = SpatialIndex(schemas.Event, date_field="date")
+venue_spatial_index = SpatialIndex(schemas.Venue)
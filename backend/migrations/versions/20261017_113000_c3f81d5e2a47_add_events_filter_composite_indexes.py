@@ -0,0 +1,30 @@
+"""add_events_filter_composite_indexes
+
+Revision ID: c3f81d5e2a47
+Revises: b7e4c2a9d103
+Create Date: 2026-10-17 11:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3f81d5e2a47'
+down_revision: Union[str, None] = 'b7e4c2a9d103'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_events_city_date', 'events', ['city', 'date'], unique=False)
+    op.create_index('ix_events_genre_date', 'events', ['genre', 'date'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_events_genre_date', table_name='events')
+    op.drop_index('ix_events_city_date', table_name='events')
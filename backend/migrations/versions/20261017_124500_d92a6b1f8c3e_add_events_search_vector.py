@@ -0,0 +1,61 @@
+"""add_events_search_vector
+
+Revision ID: d92a6b1f8c3e
+Revises: c3f81d5e2a47
+Create Date: 2026-10-17 12:45:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd92a6b1f8c3e'
+down_revision: Union[str, None] = 'c3f81d5e2a47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Copia de las definiciones de app.models al momento de esta revisión: la migración
+# no debe cambiar si el modelo cambia después
+SEARCH_CONFIG = 'spanish_unaccent'
+
+CREATE_SEARCH_CONFIG_SQL = """
+CREATE EXTENSION IF NOT EXISTS unaccent;
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'spanish_unaccent') THEN
+        CREATE TEXT SEARCH CONFIGURATION spanish_unaccent (COPY = spanish);
+        ALTER TEXT SEARCH CONFIGURATION spanish_unaccent
+            ALTER MAPPING FOR hword, hword_part, word WITH unaccent, spanish_stem;
+    END IF;
+END
+$$;
+"""
+
+EVENT_SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('spanish_unaccent'::regconfig, coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('spanish_unaccent'::regconfig, coalesce(artist, '')), 'A') || "
+    "setweight(to_tsvector('spanish_unaccent'::regconfig, coalesce(description, '')), 'C')"
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(CREATE_SEARCH_CONFIG_SQL)
+    op.add_column('events', sa.Column(
+        'search_vector',
+        postgresql.TSVECTOR(),
+        sa.Computed(EVENT_SEARCH_VECTOR_SQL, persisted=True),
+        nullable=True
+    ))
+    op.create_index('ix_events_search_vector', 'events', ['search_vector'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_events_search_vector', table_name='events')
+    op.drop_column('events', 'search_vector')
+    op.execute(f"DROP TEXT SEARCH CONFIGURATION IF EXISTS {SEARCH_CONFIG}")
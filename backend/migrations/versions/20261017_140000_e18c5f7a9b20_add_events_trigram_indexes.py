@@ -0,0 +1,36 @@
+"""add_events_trigram_indexes
+
+Revision ID: e18c5f7a9b20
+Revises: d92a6b1f8c3e
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e18c5f7a9b20'
+down_revision: Union[str, None] = 'd92a6b1f8c3e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index('ix_events_name_trgm', 'events', ['name'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+    op.create_index('ix_events_artist_trgm', 'events', ['artist'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'artist': 'gin_trgm_ops'})
+    op.create_index('ix_events_venue_trgm', 'events', ['venue'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'venue': 'gin_trgm_ops'})
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_events_venue_trgm', table_name='events')
+    op.drop_index('ix_events_artist_trgm', table_name='events')
+    op.drop_index('ix_events_name_trgm', table_name='events')
@@ -0,0 +1,28 @@
+"""add_events_date_types_gin_index
+
+Revision ID: f4a7d3c1e962
+Revises: e18c5f7a9b20
+Create Date: 2026-10-17 15:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f4a7d3c1e962'
+down_revision: Union[str, None] = 'e18c5f7a9b20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_events_date_types', 'events', ['date_types'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_events_date_types', table_name='events')
@@ -0,0 +1,28 @@
+"""add_events_lat_lng_index
+
+Revision ID: 0b5e9c8d2f14
+Revises: f4a7d3c1e962
+Create Date: 2026-10-17 16:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0b5e9c8d2f14'
+down_revision: Union[str, None] = 'f4a7d3c1e962'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_events_lat_lng', 'events', ['latitude', 'longitude'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_events_lat_lng', table_name='events')
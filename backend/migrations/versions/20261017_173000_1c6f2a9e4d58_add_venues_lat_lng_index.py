@@ -0,0 +1,28 @@
+"""add_venues_lat_lng_index
+
+Revision ID: 1c6f2a9e4d58
+Revises: 0b5e9c8d2f14
+Create Date: 2026-10-17 17:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1c6f2a9e4d58'
+down_revision: Union[str, None] = '0b5e9c8d2f14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_venues_lat_lng', 'venues', ['latitude', 'longitude'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_venues_lat_lng', table_name='venues')
@@ -0,0 +1,60 @@
+"""add_event_venue_id
+
+Revision ID: 2d7b3e8f5a61
+Revises: 1c6f2a9e4d58
+Create Date: 2026-10-17 18:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2d7b3e8f5a61'
+down_revision: Union[str, None] = '1c6f2a9e4d58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('events', sa.Column('venue_id', sa.Integer(), nullable=True))
+    op.create_foreign_key('fk_events_venue_id_venues', 'events', 'venues', ['venue_id'], ['id'], ondelete='SET NULL')
+    op.create_index(op.f('ix_events_venue_id'), 'events', ['venue_id'], unique=False)
+
+    # Backfill: asociar cada evento al venue con el mismo nombre (sin distinguir mayúsculas)
+    # y la misma ciudad; si a alguno le falta la ciudad, solo cuando ese nombre es de un
+    # único venue. Ante varios venues iguales en la ciudad, el de menor id
+    op.execute("""
+        UPDATE events AS e
+        SET venue_id = m.venue_id
+        FROM (
+            SELECT DISTINCT ON (ev.id) ev.id AS event_id, v.id AS venue_id
+            FROM events AS ev
+            JOIN venues AS v ON lower(trim(v.name)) = lower(trim(ev.venue))
+            WHERE lower(trim(v.city)) = lower(trim(ev.city))
+               OR ((v.city IS NULL OR ev.city IS NULL) AND NOT EXISTS (
+                    SELECT 1 FROM venues AS other
+                    WHERE lower(trim(other.name)) = lower(trim(v.name)) AND other.id <> v.id
+               ))
+            ORDER BY ev.id, v.id
+        ) AS m
+        WHERE e.id = m.event_id
+    """)
+    # Los eventos sin coordenadas toman las de su venue; las propias no se pisan
+    op.execute("""
+        UPDATE events AS e
+        SET latitude = v.latitude, longitude = v.longitude
+        FROM venues AS v
+        WHERE e.venue_id = v.id
+          AND (e.latitude IS NULL OR e.longitude IS NULL)
+          AND v.latitude IS NOT NULL AND v.longitude IS NOT NULL
+    """)
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_events_venue_id'), table_name='events')
+    op.drop_constraint('fk_events_venue_id_venues', 'events', type_='foreignkey')
+    op.drop_column('events', 'venue_id')
@@ -0,0 +1,30 @@
+"""add_events_related_indexes
+
+Revision ID: 3e8c4f9a6b72
+Revises: 2d7b3e8f5a61
+Create Date: 2026-10-17 19:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3e8c4f9a6b72'
+down_revision: Union[str, None] = '2d7b3e8f5a61'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_events_artist_date', 'events', ['artist', 'date'], unique=False)
+    op.create_index('ix_events_venue_id_date', 'events', ['venue_id', 'date'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_events_venue_id_date', table_name='events')
+    op.drop_index('ix_events_artist_date', table_name='events')
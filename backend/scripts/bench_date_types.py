@@ -0,0 +1,56 @@
+"""
+Benchmark del filtro date_types de crud.get_events a medida que crece la tabla events:
+mide la latencia p95 de la página (ORDER BY date, id LIMIT) y del COUNT del total con el
+índice GIN ix_events_date_types y sin él (se elimina dentro de un SAVEPOINT). El tipo
+'agotado' lo tienen siempre FIXED_TAG_ROWS eventos, así que con el índice su latencia
+debería mantenerse plana mientras que sin índice crece con la tabla.
+
+Usa DATABASE_URL (o las variables POSTGRES_*) pero trabaja en un schema temporal que se
+descarta al terminar.
+
+Uso: python scripts/bench_date_types.py [repeticiones]
+"""
+import sys
+
+from sqlalchemy import func, text
+
+from bench_db import bench_schema, seed_events, time_query, FIXED_TAG_ROWS
+from app import crud, models
+
+SIZES = [100_000, 200_000, 400_000, 800_000]
+PAGE_SIZE = 20
+CASES = {
+    "agotado (all)": (["agotado"], "all"),
+    "accesible (all)": (["accesible"], "all"),
+    "gratis+noche (all)": (["gratis", "noche"], "all"),
+    "accesible|gratis (any)": (["accesible", "gratis"], "any"),
+}
+
+def measure(db, date_types, date_types_match, repeat: int):
+    query, _ = crud._apply_event_filters(
+        db.query(models.Event), date_types=date_types, date_types_match=date_types_match
+    )
+    page = time_query(query.order_by(models.Event.date, models.Event.id).limit(PAGE_SIZE + 1), repeat)
+    total = time_query(query.with_entities(func.count(models.Event.id)), repeat)
+    return page["p95"], total["p95"]
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+
+    with bench_schema() as db:
+        print(f"'agotado' en {FIXED_TAG_ROWS} eventos, {repeat} repeticiones; p95 en ms")
+        print(f"{'eventos':>8} {'filtro':<24} {'página GIN':>11} {'total GIN':>10} {'página sin':>11} {'total sin':>10}")
+        seeded = 0
+        for size in SIZES:
+            seed_events(db, seeded + 1, size)
+            seeded = size
+            for name, (date_types, match) in CASES.items():
+                page, total = measure(db, date_types, match, repeat)
+                savepoint = db.begin_nested()
+                db.execute(text("DROP INDEX ix_events_date_types"))
+                page_without, total_without = measure(db, date_types, match, repeat)
+                savepoint.rollback()
+                print(f"{size:>8} {name:<24} {page:>11.2f} {total:>10.2f} {page_without:>11.2f} {total_without:>10.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Utilidades compartidas por los benchmarks contra Postgres (bench_explain_dates.py,
+bench_search.py y bench_date_types.py): crean las tablas events y venues de los
+modelos en un schema temporal, las llenan con eventos sintéticos y deshacen todo
+con un ROLLBACK al terminar, así que no modifican los datos de DATABASE_URL.
+
+No se ejecuta directamente.
+"""
+import os
+import sys
+import time
+import logging
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+
+from dotenv import load_dotenv
+
+# Add the parent directory to the Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+load_dotenv()
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app import models
+from app.database import engine
+
+logging.disable(logging.CRITICAL)
+# La configuración de la app loguea cada consulta
+engine.echo = False
+
+SCHEMA = f"bench_{os.getpid()}"
+GENRES = ["rock", "pop", "jazz", "cumbia", "folklore", "tango", "electrónica", "metal"]
+CITIES = 60
+DAYS = 365
+START = datetime.combine(datetime.now().date(), datetime.min.time())
+# Cantidad fija de eventos con date_types 'agotado', sin importar el tamaño de la tabla
+FIXED_TAG_ROWS = 200
+
+SEED_EVENTS_SQL = """
+INSERT INTO events (
+    id, name, artist, genre, date, location, city, venue, description,
+    is_featured, date_types, created_at, updated_at
+)
+SELECT
+    g,
+    'Evento ' || g,
+    'Artista ' || (g * 7919 % 20000),
+    (ARRAY['rock', 'pop', 'jazz', 'cumbia', 'folklore', 'tango', 'electrónica', 'metal'])[1 + g * 31 % 8],
+    CAST(:start AS timestamp) + (g * 104729 % (:days * 24)) * interval '1 hour',
+    'Dirección ' || g,
+    'Ciudad ' || (g * 17 % :cities),
+    'Venue ' || (g * 13 % 3000),
+    'Recital ' ||
+        (ARRAY['acústico', 'aniversario', 'despedida', 'gira', 'festival',
+               'presentación', 'homenaje', 'estreno', 'tributo', 'sinfónico'])[1 + g * 11 % 10] ||
+        ' de Artista ' || (g * 7919 % 20000) || ' en Ciudad ' || (g * 17 % :cities),
+    g % 50 = 0,
+    CASE
+        WHEN g <= :fixed_tag_rows THEN ARRAY['agotado', 'noche']
+        WHEN g % 97 = 0 THEN ARRAY['accesible', 'noche']
+        WHEN g * 23 % 8 = 0 THEN NULL
+        WHEN g * 23 % 8 IN (1, 2) THEN ARRAY['noche']
+        WHEN g * 23 % 8 = 3 THEN ARRAY['noche', 'fin_de_semana']
+        WHEN g * 23 % 8 = 4 THEN ARRAY['fin_de_semana']
+        WHEN g * 23 % 8 = 5 THEN ARRAY['gratis', 'noche']
+        ELSE ARRAY[]::text[]
+    END,
+    now(),
+    now()
+FROM generate_series(CAST(:first AS bigint), CAST(:last AS bigint)) AS g
+"""
+
+@contextmanager
+def bench_schema() -> Iterator[Session]:
+    """
+    Session sobre un schema temporal con las tablas de los modelos (mismos índices que
+    la app); al salir se hace ROLLBACK y el schema desaparece
+    """
+    with engine.connect() as connection:
+        transaction = connection.begin()
+        try:
+            connection.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+            connection.execute(text(f"SET LOCAL search_path TO {SCHEMA}, public"))
+            models.Base.metadata.create_all(
+                connection, tables=[models.Venue.__table__, models.Event.__table__], checkfirst=False
+            )
+            with Session(bind=connection) as db:
+                yield db
+        finally:
+            transaction.rollback()
+
+def seed_events(db: Session, first: int, last: int) -> None:
+    """
+    Inserta los eventos con id en [first, last] repartidos en DAYS días desde hoy y
+    actualiza las estadísticas del planner
+    """
+    db.execute(text(SEED_EVENTS_SQL), {
+        "first": first, "last": last, "start": START, "days": DAYS, "cities": CITIES,
+        "fixed_tag_rows": FIXED_TAG_ROWS
+    })
+    db.execute(text("ANALYZE events"))
+
+def compile_query(query) -> Tuple[str, dict]:
+    """
+    SQL y parámetros de una Query del ORM, para ejecutarla con EXPLAIN
+    """
+    compiled = query.statement.compile(dialect=query.session.get_bind().dialect)
+    return str(compiled), compiled.params
+
+def explain(db: Session, query) -> dict:
+    """
+    Plan (EXPLAIN FORMAT JSON) de una Query del ORM
+    """
+    sql, params = compile_query(query)
+    result = db.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}", params)
+    return result.scalar()[0]["Plan"]
+
+def plan_nodes(plan: dict) -> List[dict]:
+    """
+    Nodos del plan en preorden
+    """
+    nodes, pending = [], [plan]
+    while pending:
+        node = pending.pop()
+        nodes.append(node)
+        pending.extend(reversed(node.get("Plans", [])))
+    return nodes
+
+def time_query(query, repeat: int) -> Dict[str, float]:
+    """
+    Ejecuta la consulta repeat veces (tras una de calentamiento) y devuelve p50 y p95 en ms
+    """
+    query.all()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        query.all()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        "p50": samples[len(samples) // 2],
+        "p95": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+    }
+
+def week_range(offset_days: int = 30) -> Tuple[date, date]:
+    """
+    Rango [date_from, date_to] de una semana dentro del período sembrado
+    """
+    date_from = START + timedelta(days=offset_days)
+    return date_from.date(), (date_from + timedelta(days=6)).date()
@@ -0,0 +1,72 @@
+"""
+Verifica con EXPLAIN que los filtros de fecha de crud.get_events usan los índices sobre
+events.date sobre una tabla sembrada con 500k eventos: rango de fechas, ciudad + fechas
+y género + fechas, tanto la página (ORDER BY date, id LIMIT) como el COUNT del total.
+Como referencia muestra el plan del filtro anterior con func.date(). Sale con código 1
+si alguna consulta hace Seq Scan sobre events o no usa un índice sobre date.
+
+Usa DATABASE_URL (o las variables POSTGRES_*) pero trabaja en un schema temporal que se
+descarta al terminar.
+
+Uso: python scripts/bench_explain_dates.py [eventos]
+"""
+import sys
+
+from sqlalchemy import func
+
+from bench_db import bench_schema, seed_events, explain, plan_nodes, week_range, GENRES
+from app import crud, models
+
+PAGE_SIZE = 20
+# Índices de events que incluyen la columna date
+DATE_INDEXES = {
+    index.name for index in models.Event.__table__.indexes if "date" in index.columns.keys()
+}
+
+def describe(plan: dict) -> str:
+    return ", ".join(
+        f"{node['Node Type']} ({node['Index Name']})" if "Index Name" in node else node["Node Type"]
+        for node in plan_nodes(plan)
+        if "Relation Name" in node or "Index Name" in node
+    )
+
+def uses_date_index(plan: dict) -> bool:
+    nodes = plan_nodes(plan)
+    seq_scan = any(node["Node Type"] == "Seq Scan" and node.get("Relation Name") == "events" for node in nodes)
+    return not seq_scan and any(node.get("Index Name") in DATE_INDEXES for node in nodes)
+
+def main():
+    events = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    date_from, date_to = week_range()
+    cases = {
+        "rango de fechas": {"date_from": date_from, "date_to": date_to},
+        "ciudad + fechas": {"city": "Ciudad 7", "date_from": date_from, "date_to": date_to},
+        "género + fechas": {"genre": GENRES[2], "date_from": date_from, "date_to": date_to},
+    }
+
+    failed = False
+    with bench_schema() as db:
+        seed_events(db, 1, events)
+        print(f"{events} eventos sembrados")
+        for name, filters in cases.items():
+            query, _ = crud._apply_event_filters(db.query(models.Event), **filters)
+            for kind, statement in (
+                ("página", query.order_by(models.Event.date, models.Event.id).limit(PAGE_SIZE + 1)),
+                ("total", query.with_entities(func.count(models.Event.id))),
+            ):
+                plan = explain(db, statement)
+                ok = uses_date_index(plan)
+                failed |= not ok
+                print(f"{'OK ' if ok else 'ERR'} {name:<16} {kind:<7} {describe(plan)}")
+
+        legacy = db.query(models.Event).filter(
+            func.date(models.Event.date) >= date_from, func.date(models.Event.date) <= date_to
+        ).order_by(models.Event.date, models.Event.id).limit(PAGE_SIZE + 1)
+        print(f"--  filtro anterior con func.date(): {describe(explain(db, legacy))}")
+
+    if failed:
+        print("Alguna consulta no usa un índice sobre events.date")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Microbenchmark de las búsquedas por cercanía en memoria: throughput de haversine_np
+frente a la misma fórmula en Python puro (geo.haversine) y de SpatialIndex.query_radius
+frente a un recorrido completo con haversine_np, con 10k, 100k y 1M puntos sintéticos
+repartidos sobre Argentina. No usa la base de datos.
+
+Uso: python scripts/bench_geo.py [repeticiones]
+"""
+import sys
+import logging
+import timeit
+from pathlib import Path
+
+import numpy as np
+from pydantic import BaseModel
+
+# Add the parent directory to the Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.geo import haversine, haversine_np
+from app.spatial_index import SpatialIndex
+
+logging.disable(logging.CRITICAL)
+
+SIZES = [10_000, 100_000, 1_000_000]
+RADII = [10, 50]
+# Bounding box aproximado de Argentina continental
+MIN_LAT, MAX_LAT = -55.0, -22.0
+MIN_LNG, MAX_LNG = -73.0, -53.0
+CENTERS = 50
+
+class Point(BaseModel):
+    id: int
+    latitude: float
+    longitude: float
+
+def make_points(rng: np.random.Generator, size: int):
+    return rng.uniform(MIN_LAT, MAX_LAT, size), rng.uniform(MIN_LNG, MAX_LNG, size)
+
+def build_index(lats: np.ndarray, lngs: np.ndarray) -> SpatialIndex:
+    index = SpatialIndex(Point)
+    index.rebuild(
+        Point(id=position, latitude=lat, longitude=lng)
+        for position, (lat, lng) in enumerate(zip(lats.tolist(), lngs.tolist()))
+    )
+    index.query_radius(0.0, 0.0, 1)  # genera los arrays fuera de la medición
+    return index
+
+def full_scan(lat: float, lng: float, radius: float, lats: np.ndarray, lngs: np.ndarray) -> int:
+    return int(np.count_nonzero(haversine_np(lat, lng, lats, lngs) <= radius))
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    rng = np.random.default_rng(12)
+    centers = list(zip(*make_points(rng, CENTERS)))
+
+    print(f"{'puntos':>10} {'python (Mpts/s)':>16} {'numpy (Mpts/s)':>15} {'mejora':>8}")
+    datasets = {}
+    for size in SIZES:
+        lats, lngs = make_points(rng, size)
+        datasets[size] = (lats, lngs)
+        lat, lng = centers[0]
+        # El recorrido en Python puro se mide sobre a lo sumo 100k puntos
+        sample = min(size, 100_000)
+        sample_lats, sample_lngs = lats[:sample].tolist(), lngs[:sample].tolist()
+        python = timeit.timeit(
+            lambda: [haversine(lat, lng, a, b) for a, b in zip(sample_lats, sample_lngs)], number=1
+        )
+        vectorized = timeit.timeit(lambda: haversine_np(lat, lng, lats, lngs), number=repeat) / repeat
+        python_rate, numpy_rate = sample / python / 1e6, size / vectorized / 1e6
+        print(f"{size:>10} {python_rate:>16.2f} {numpy_rate:>15.2f} {numpy_rate / python_rate:>7.1f}x")
+
+    print()
+    print(f"{'puntos':>10} {'radio (km)':>10} {'scan (q/s)':>11} {'índice (q/s)':>13} {'mejora':>8}")
+    for size in SIZES:
+        lats, lngs = datasets[size]
+        index = build_index(lats, lngs)
+        for radius in RADII:
+            for lat, lng in centers[:5]:
+                assert len(index.query_radius(lat, lng, radius)) == full_scan(lat, lng, radius, lats, lngs)
+            scan = timeit.timeit(
+                lambda: [full_scan(lat, lng, radius, lats, lngs) for lat, lng in centers], number=repeat
+            ) / (repeat * CENTERS)
+            indexed = timeit.timeit(
+                lambda: [index.query_radius(lat, lng, radius) for lat, lng in centers], number=repeat
+            ) / (repeat * CENTERS)
+            print(f"{size:>10} {radius:>10} {1 / scan:>11.0f} {1 / indexed:>13.0f} {scan / indexed:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Benchmark del parámetro search de crud.get_events: compara la latencia p50/p95 de la
+búsqueda full-text actual (websearch_to_tsquery sobre search_vector con índice GIN,
+ordenada por ts_rank) con la búsqueda anterior (ilike '%q%' sobre name, artist y
+description), sobre una tabla sembrada con eventos sintéticos.
+
+Usa DATABASE_URL (o las variables POSTGRES_*) pero trabaja en un schema temporal que se
+descarta al terminar.
+
+Uso: python scripts/bench_search.py [eventos] [repeticiones]
+"""
+import sys
+
+from sqlalchemy import func, or_
+
+from bench_db import bench_schema, seed_events, time_query
+from app import crud, models
+
+PAGE_SIZE = 20
+# Términos frecuentes, poco frecuentes y sin resultados; "homenaje ciudad 7" y "sinfonico"
+# solo tienen resultados con full-text (palabras no contiguas, sin acento)
+TERMS = ["festival", "homenaje ciudad 7", "Artista 1234", "sinfonico", "inexistente"]
+
+def fts_query(db, search: str):
+    query, ts_query = crud._apply_event_filters(db.query(models.Event), search=search)
+    return query.order_by(
+        func.ts_rank(models.Event.search_vector, ts_query).desc(),
+        models.Event.date,
+        models.Event.id
+    ).limit(PAGE_SIZE + 1)
+
+def ilike_query(db, search: str):
+    return db.query(models.Event).filter(or_(
+        models.Event.name.ilike(f"%{search}%"),
+        models.Event.artist.ilike(f"%{search}%"),
+        models.Event.description.ilike(f"%{search}%")
+    )).order_by(models.Event.date, models.Event.id).limit(PAGE_SIZE + 1)
+
+def main():
+    events = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    with bench_schema() as db:
+        seed_events(db, 1, events)
+        print(f"{events} eventos sembrados, {repeat} repeticiones por consulta")
+        print(f"{'término':<18} {'ilike p50':>10} {'ilike p95':>10} {'fts p50':>9} {'fts p95':>9} {'mejora p95':>11}")
+        for term in TERMS:
+            legacy = time_query(ilike_query(db, term), repeat)
+            fts = time_query(fts_query(db, term), repeat)
+            print(
+                f"{term:<18} {legacy['p50']:>10.2f} {legacy['p95']:>10.2f} "
+                f"{fts['p50']:>9.2f} {fts['p95']:>9.2f} {legacy['p95'] / fts['p95']:>10.1f}x"
+            )
+        print("(latencias en ms)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Microbenchmark del escáner de amenazas de SecurityMiddleware: compara la validación
+anterior (SQL_INJECTION_PATTERNS y XSS_PATTERNS por separado, JSON recursivo) con
+contains_threat y el recorrido iterativo, sobre payloads realistas y adversarios.
+
+Uso: python scripts/bench_threat_scanner.py [repeticiones]
+"""
+import sys
+import json
+import logging
+import timeit
+from pathlib import Path
+
+# Add the parent directory to the Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.middleware import SecurityMiddleware, SQL_INJECTION_PATTERNS, XSS_PATTERNS
+
+logging.disable(logging.CRITICAL)
+
+def legacy_has_threat(value: str) -> bool:
+    return bool(SQL_INJECTION_PATTERNS.search(value) or XSS_PATTERNS.search(value))
+
+def legacy_validate_json(data) -> bool:
+    if isinstance(data, dict):
+        return all(
+            key and len(key) <= 100 and not legacy_has_threat(key) and legacy_validate_json(value)
+            for key, value in data.items()
+        )
+    if isinstance(data, list):
+        return all(legacy_validate_json(item) for item in data)
+    if isinstance(data, str):
+        return not legacy_has_threat(data) and len(data) <= 10000
+    return True
+
+EVENT = {
+    "name": "Noche de rock nacional en el Teatro Vorterix",
+    "artist": "Los Piojos",
+    "genre": "Rock",
+    "date": "2026-11-21T21:00:00",
+    "location": "Av. Federico Lacroze 3455, Colegiales",
+    "city": "Buenos Aires",
+    "venue": "Teatro Vorterix",
+    "description": "Show aniversario con invitados especiales. Apertura de puertas 20 h, "
+                   "menores acompañados por un adulto. ¡Últimas entradas!" * 3,
+    "image_url": "https://example.com/images/los-piojos.jpg",
+    "ticket_url": "https://tickets.example.com/evento/12345?utm_source=agenda",
+    "is_featured": False,
+    "date_types": ["noche", "fin_de_semana"],
+    "ticket_price": 25000,
+}
+
+PAYLOADS = {
+    "evento realista": EVENT,
+    "bulk de 200 eventos": [EVENT] * 200,
+    "texto con < y >": {**EVENT, "description": "precio < 10000 y edad > 18 " * 100},
+    "script sin cierre": {**EVENT, "description": "<script>" + "a" * 9000},
+    "muchas aperturas": {**EVENT, "description": "<script>" * 1200},
+    "anidado (300 niveles)": json.loads("[" * 300 + '"x"' + "]" * 300),
+}
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    middleware = SecurityMiddleware(app=None)
+    print(f"{'payload':<22} {'anterior (ms)':>14} {'combinado (ms)':>15} {'mejora':>8}")
+    for name, payload in PAYLOADS.items():
+        assert middleware._validate_json_data(payload) == legacy_validate_json(payload)
+        legacy = timeit.timeit(lambda: legacy_validate_json(payload), number=repeat) / repeat * 1000
+        combined = timeit.timeit(lambda: middleware._validate_json_data(payload), number=repeat) / repeat * 1000
+        print(f"{name:<22} {legacy:>14.4f} {combined:>15.4f} {legacy / combined:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Add the backend directory to the Python path so tests can import app
+sys.path.append(str(Path(__file__).parent.parent))
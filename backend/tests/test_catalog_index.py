@@ -0,0 +1,150 @@
+"""
+Paridad de CatalogIndex.query con las reglas de filtrado y paginación de la consulta SQL
+de crud.get_events (sin búsqueda)
+"""
+import random
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from app.catalog_index import CatalogIndex
+
+BASE = datetime(2026, 10, 1)
+GENRES = [None, "rock", "jazz", "cumbia"]
+CITIES = ["Buenos Aires", "Córdoba", "Rosario"]
+DATE_TYPES = [None, [], ["noche"], ["noche", "fin_de_semana"], ["gratis"], ["fin_de_semana", "gratis"]]
+
+def make_events(rng: random.Random, count: int = 300):
+    now = datetime.now()
+    return [
+        SimpleNamespace(
+            id=event_id,
+            name=f"Evento {event_id}",
+            artist="Artista",
+            genre=rng.choice(GENRES),
+            # Pocas horas distintas para que haya muchas fechas repetidas (desempate por id)
+            date=BASE + timedelta(days=rng.randint(0, 30), hours=rng.choice([20, 21])),
+            location="Dirección",
+            city=rng.choice(CITIES),
+            venue="Venue",
+            description=None,
+            image_url=None,
+            ticket_url=None,
+            is_featured=False,
+            latitude=None,
+            longitude=None,
+            date_types=rng.choice(DATE_TYPES),
+            ticket_price=None,
+            venue_id=None,
+            created_at=now,
+            updated_at=now,
+        )
+        for event_id in rng.sample(range(1, 10 * count), count)
+    ]
+
+def sql_reference(events, genre, city, date_from, date_to, date_types, date_types_match):
+    """
+    Reglas de _apply_event_filters: igualdad en genre/city, rango semiabierto de fechas y
+    date_types con @> (all) o && (any); con date_types NULL ambos operadores dan NULL
+    """
+    def matches(event):
+        if genre and event.genre != genre:
+            return False
+        if city and event.city != city:
+            return False
+        if date_from is not None and event.date < date_from:
+            return False
+        if date_to is not None and event.date >= date_to:
+            return False
+        if date_types:
+            if event.date_types is None:
+                return False
+            if date_types_match == "any":
+                return bool(set(date_types) & set(event.date_types))
+            return set(date_types) <= set(event.date_types)
+        return True
+    return sorted((event for event in events if matches(event)), key=lambda event: (event.date, event.id))
+
+def random_filters(rng: random.Random) -> dict:
+    date_from = rng.choice([None, BASE + timedelta(days=rng.randint(0, 20))])
+    date_to = rng.choice([None, BASE + timedelta(days=rng.randint(5, 35))])
+    return {
+        "genre": rng.choice(GENRES + ["tango"]),
+        "city": rng.choice([None] + CITIES + ["Mendoza"]),
+        "date_from": date_from,
+        "date_to": date_to,
+        "date_types": rng.choice([None, ["noche"], ["noche", "gratis"], ["inexistente"], ["noche", "inexistente"]]),
+        "date_types_match": rng.choice(["all", "any"]),
+    }
+
+@pytest.fixture(scope="module")
+def catalog():
+    rng = random.Random(19)
+    events = make_events(rng)
+    index = CatalogIndex()
+    index.rebuild(events, BASE)
+    return index, events
+
+def test_random_filters_match_sql_with_cursor_paging(catalog):
+    index, events = catalog
+    rng = random.Random(2026)
+    for _ in range(500):
+        filters = random_filters(rng)
+        expected = [event.id for event in sql_reference(events, **filters)]
+        limit = rng.randint(1, 25)
+
+        seen, after = [], None
+        while True:
+            total, page = index.query(**filters, after=after, limit=limit + 1)
+            assert total == len(expected), filters
+            has_more = len(page) > limit
+            page = page[:limit]
+            seen.extend(event.id for event in page)
+            if not has_more:
+                break
+            after = (page[-1].date, page[-1].id)
+        assert seen == expected, filters
+
+def test_skip_matches_offset(catalog):
+    index, events = catalog
+    rng = random.Random(7)
+    for _ in range(100):
+        filters = random_filters(rng)
+        expected = [event.id for event in sql_reference(events, **filters)]
+        skip, limit = rng.randint(0, 40), rng.randint(1, 20)
+        total, page = index.query(**filters, skip=skip, limit=limit)
+        assert total == len(expected)
+        assert [event.id for event in page] == expected[skip:skip + limit]
+
+def test_unknown_date_type_matches_nothing_for_all(catalog):
+    index, events = catalog
+    assert index.query(date_types=["inexistente"], date_types_match="all") == (0, [])
+    assert index.query(date_types=["noche", "inexistente"], date_types_match="all") == (0, [])
+    total, page = index.query(date_types=["noche", "inexistente"], date_types_match="any")
+    expected = sql_reference(events, None, None, None, None, ["noche"], "any")
+    assert [event.id for event in page] == [event.id for event in expected]
+
+def test_null_date_types_never_match(catalog):
+    index, events = catalog
+    without_types = {event.id for event in events if event.date_types is None}
+    assert without_types
+    for match in ("all", "any"):
+        _, page = index.query(date_types=["noche"], date_types_match=match)
+        assert not without_types & {event.id for event in page}
+
+def test_upsert_and_remove_update_results(catalog):
+    _, events = catalog
+    index = CatalogIndex()
+    index.rebuild(events[:10], BASE)
+    moved = SimpleNamespace(**{**vars(events[0]), "city": "Mendoza"})
+    index.upsert(moved)
+    index.remove(events[1].id)
+    _, page = index.query(city="Mendoza")
+    assert [event.id for event in page] == [moved.id]
+    _, page = index.query()
+    assert events[1].id not in {event.id for event in page}
+    # Los eventos anteriores a since no entran al índice
+    index.upsert(SimpleNamespace(**{**vars(events[2]), "date": BASE - timedelta(days=1)}))
+    _, page = index.query()
+    assert events[2].id not in {event.id for event in page}
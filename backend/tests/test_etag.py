@@ -0,0 +1,65 @@
+"""
+GET condicional de app.etag, con la huella de la tabla simulada (sin base de datos)
+"""
+from datetime import datetime
+
+import pytest
+from fastapi import Response
+from starlette.requests import Request
+
+from app import etag
+
+class FakeEvent:
+    __tablename__ = "events"
+
+@pytest.fixture
+def fingerprint(monkeypatch):
+    state = {"value": (datetime(2026, 10, 17, 12, 0), 10)}
+    monkeypatch.setattr(etag, "table_fingerprint", lambda db, model: state["value"])
+    return state
+
+def make_request(path="/events", query=b"", headers=None):
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": path,
+        "query_string": query,
+        "headers": [(name.encode(), value.encode()) for name, value in (headers or {}).items()],
+    })
+
+def current_etag(**kwargs):
+    response = Response()
+    assert etag.check_not_modified(make_request(**kwargs), response, None, FakeEvent) is None
+    return response.headers["etag"]
+
+def test_matching_etag_returns_304(fingerprint):
+    tag = current_etag()
+    result = etag.check_not_modified(make_request(headers={"if-none-match": tag}), Response(), None, FakeEvent)
+    assert result.status_code == 304
+
+def test_delete_changes_etag_and_if_modified_since_is_ignored(fingerprint):
+    tag = current_etag()
+    # Borrar una fila no cambia max(updated_at), solo la cantidad
+    fingerprint["value"] = (datetime(2026, 10, 17, 12, 0), 9)
+    headers = {"if-modified-since": "Sat, 17 Oct 2026 12:00:00 GMT"}
+    assert etag.check_not_modified(make_request(headers=headers), Response(), None, FakeEvent) is None
+    headers["if-none-match"] = tag
+    assert etag.check_not_modified(make_request(headers=headers), Response(), None, FakeEvent) is None
+
+def test_date_dependent_etag_changes_at_midnight(fingerprint, monkeypatch):
+    class FakeDate:
+        today_value = datetime(2026, 10, 17).date()
+
+        @classmethod
+        def today(cls):
+            return cls.today_value
+
+    monkeypatch.setattr(etag, "date", FakeDate)
+    request = make_request(path="/events/nearby", query=b"lat=-34.6&lng=-58.4")
+    before, response = Response(), Response()
+    etag.check_not_modified(request, before, None, FakeEvent, date_dependent=True)
+    FakeDate.today_value = datetime(2026, 10, 18).date()
+    headers = {"if-none-match": before.headers["etag"]}
+    request = make_request(path="/events/nearby", query=b"lat=-34.6&lng=-58.4", headers=headers)
+    assert etag.check_not_modified(request, response, None, FakeEvent, date_dependent=True) is None
+    assert response.headers["etag"] != before.headers["etag"]
@@ -0,0 +1,157 @@
+"""
+SecurityMiddleware probado a nivel ASGI, con un receive() que entrega el body en chunks
+"""
+import asyncio
+import json
+
+from app.middleware import (
+    SecurityMiddleware, RoutePolicyTable, _BodyInspector, SCAN_WINDOW, POLICY_NONE, POLICY_QUERY, POLICY_BODY
+)
+
+async def echo_app(scope, receive, send):
+    """
+    Lee el body completo desde receive y responde 200 con su tamaño
+    """
+    size, more_body = 0, True
+    while more_body:
+        message = await receive()
+        if message["type"] != "http.request":
+            raise RuntimeError("client disconnected")
+        size += len(message.get("body", b""))
+        more_body = message.get("more_body", False)
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": json.dumps({"size": size}).encode()})
+
+def post(chunks, content_type="text/plain", path="/events/", app=echo_app):
+    """
+    Envía un POST con el body partido en chunks; devuelve (status, body, lecturas de receive)
+    """
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "headers": [(b"content-type", content_type.encode())],
+        "http_version": "1.1",
+        "scheme": "http",
+        "server": ("testserver", 80),
+        "root_path": "",
+    }
+    messages = [
+        {"type": "http.request", "body": chunk, "more_body": position < len(chunks) - 1}
+        for position, chunk in enumerate(chunks)
+    ]
+    reads, sent = [0], []
+
+    async def receive():
+        reads[0] += 1
+        return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(SecurityMiddleware(app)(scope, receive, send))
+    return sent[0]["status"], sent[1]["body"], reads[0]
+
+def test_plain_body_is_forwarded():
+    status, body, _ = post([b"hola ", b"mundo"])
+    assert status == 200
+    assert json.loads(body) == {"size": 10}
+
+def test_pattern_split_across_chunks_is_rejected():
+    status, _, _ = post([b"texto union se", b"lect * from events"])
+    assert status == 400
+
+def test_script_longer_than_scan_window_across_chunks_is_rejected():
+    status, _, _ = post([b"<script>" + b"a" * 10240, b"</script>"])
+    assert status == 400
+
+def test_closing_tag_split_across_chunks_is_rejected():
+    status, _, _ = post([b"<script>" + b"a" * 10240 + b"</scr", b"ipt>"])
+    assert status == 400
+
+def test_closing_tag_matched_like_the_regex_ignoring_case():
+    # re.IGNORECASE también iguala la "ſ" (s larga) con la "s"
+    status, _, _ = post([b"<SCRIPT>" + b"a" * 10240, "</ſcript>".encode()])
+    assert status == 400
+
+def test_long_single_line_with_open_tag_keeps_the_scan_bounded():
+    # Cada chunk se escanea con a lo sumo SCAN_WINDOW caracteres del anterior, aunque
+    # la línea tenga una etiqueta abierta que todavía puede cerrarse
+    inspector = _BodyInspector(SecurityMiddleware(echo_app), "text/plain")
+    assert inspector.feed(b"<script>", True) is None
+    for _ in range(64):
+        assert inspector.feed(b"a" * 65536, True) is None
+        assert len(inspector._tail) <= SCAN_WINDOW + 1
+    assert inspector.feed(b"</script>", False) == (400, "Contenido de solicitud inválido")
+
+def test_script_closed_on_another_line_is_allowed():
+    # XSS_PATTERNS no cruza saltos de línea, igual que al validar el body completo
+    status, _, _ = post([b"<script>" + b"a" * 10240 + b"\n", b"</script>"])
+    assert status == 200
+
+def test_invalid_json_is_rejected():
+    status, _, _ = post([b'{"name": ', b'"<script>x</script>"}'], content_type="application/json")
+    assert status == 400
+
+def test_json_body_is_received_from_the_socket_once():
+    status, body, reads = post([b'{"name": "Recital"}'], content_type="application/json")
+    assert status == 200
+    assert json.loads(body) == {"size": 19}
+    assert reads == 1
+
+def test_chunked_json_body_reads_each_chunk_once():
+    chunks = [b'{"name": ', b'"Recital", ', b'"city": "Rosario"}']
+    status, body, reads = post(chunks, content_type="application/json")
+    assert status == 200
+    assert json.loads(body) == {"size": sum(len(chunk) for chunk in chunks)}
+    assert reads == len(chunks)
+
+def build_policy_table():
+    from fastapi import FastAPI, Request
+
+    app = FastAPI()
+
+    @app.get("/events/filters/genres")
+    def genres():
+        return []
+
+    @app.get("/events/{event_id}")
+    def read_event(event_id: int, include: str = None):
+        return {}
+
+    @app.get("/events/{event_id}/plain")
+    def read_plain(event_id: int):
+        return {}
+
+    @app.get("/raw")
+    def raw(request: Request):
+        return dict(request.query_params)
+
+    @app.put("/events/{event_id}")
+    def update_event(event_id: int, body: dict):
+        return body
+
+    table = RoutePolicyTable()
+    table.compile(app.routes)
+    return table
+
+def test_exempt_paths_work_without_compiling():
+    table = RoutePolicyTable()
+    assert table.lookup("POST", "/auth/token") == POLICY_NONE
+    assert table.lookup("POST", "/upload/image") == POLICY_NONE
+    assert table.lookup("POST", "/events/") == POLICY_BODY
+    assert table.lookup("GET", "/events") == POLICY_QUERY
+
+def test_route_levels_come_from_route_metadata():
+    table = build_policy_table()
+    # Sin query params declarados ni Request: la query string no se usa
+    assert table.lookup("GET", "/events/filters/genres") == POLICY_NONE
+    assert table.lookup("GET", "/events/7/plain") == POLICY_NONE
+    assert table.lookup("GET", "/events/7") == POLICY_QUERY
+    assert table.lookup("GET", "/raw") == POLICY_QUERY
+    assert table.lookup("PUT", "/events/7") == POLICY_BODY
+    # Rutas desconocidas: nivel por defecto del método
+    assert table.lookup("GET", "/docs") == POLICY_QUERY
+    assert table.lookup("POST", "/unknown") == POLICY_BODY
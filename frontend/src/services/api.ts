@@ -63,11 +63,12 @@ export const getEvents = async (
   pagination: PaginationParams = { skip: 0, limit: 12 }
 ): Promise<EventListResponse> => {
   const { genre, city, dateFrom, dateTo, search, dateTypes } = filters;
-  const { skip, limit } = pagination;
+  const { skip, limit, cursor } = pagination;
 
   const params = new URLSearchParams();
   params.append('skip', skip.toString());
   params.append('limit', limit.toString());
+  if (cursor) params.append('cursor', cursor);
 
   if (genre) params.append('genre', genre);
   if (city) params.append('city', city);
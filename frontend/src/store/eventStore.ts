@@ -12,6 +12,9 @@ interface EventState {
   loading: boolean;
   totalEvents: number;
   hasMore: boolean;
+  // Filtros efectivos de la primera página (con el dateFrom por defecto) y cursor de la siguiente
+  queryFilters: EventFilters;
+  nextCursor: string | null;
   
   // Actions
   fetchEvents: () => Promise<void>;
@@ -36,6 +39,13 @@ const DEFAULT_FILTERS: EventFilters = {
   dateTypes: undefined,
 };
 
+// Si el usuario no seleccionó filtro de fecha, aplicar dateFrom = hoy SOLO en la consulta
+const withDefaultDateFrom = (filters: EventFilters): EventFilters => {
+  if (filters.dateFrom || filters.dateTo) return { ...filters };
+  const todayISO = new Date().toISOString().slice(0, 10);
+  return { ...filters, dateFrom: todayISO };
+};
+
 export const useEventStore = create<EventState>((set, get) => ({
   events: [],
   event: null,
@@ -46,24 +56,22 @@ export const useEventStore = create<EventState>((set, get) => ({
   loading: false,
   totalEvents: 0,
   hasMore: true,
+  queryFilters: DEFAULT_FILTERS,
+  nextCursor: null,
 
   fetchEvents: async () => {
     try {
       set({ loading: true });
       let { filters, pagination } = get();
-      // Si el usuario no seleccionó filtro de fecha, aplicar dateFrom = hoy SOLO en la consulta
-      let filtersToSend = { ...filters };
-      if (!filters.dateFrom && !filters.dateTo) {
-        const today = new Date();
-        const todayISO = today.toISOString().slice(0, 10);
-        filtersToSend.dateFrom = todayISO;
-      }
+      const filtersToSend = withDefaultDateFrom(filters);
       console.log('[Store] fetchEvents - filtros enviados:', filtersToSend, 'paginacion:', pagination);
       const response = await getEvents(filtersToSend, pagination);
       set({
         events: response.items,
-        totalEvents: response.total,
-        hasMore: pagination.skip + pagination.limit < response.total,
+        totalEvents: response.total ?? response.items.length,
+        hasMore: response.hasMore,
+        queryFilters: filtersToSend,
+        nextCursor: response.nextCursor ?? null,
         loading: false,
       });
     } catch (error) {
@@ -114,11 +122,12 @@ export const useEventStore = create<EventState>((set, get) => ({
     set({
       filters: DEFAULT_FILTERS,
       pagination: DEFAULT_PAGINATION,
+      nextCursor: null,
     });
   },
 
   loadMoreEvents: async () => {
-    const { pagination, events, hasMore, filters } = get();
+    const { pagination, events, hasMore, queryFilters, nextCursor } = get();
     
     if (!hasMore || get().loading) return;
     
@@ -130,12 +139,18 @@ export const useEventStore = create<EventState>((set, get) => ({
         limit: pagination.limit,
       };
       
-      const response = await getEvents(filters, nextPagination);
+      // Mismos filtros que la primera página; con cursor el backend pagina por (date, id)
+      // en lugar de OFFSET (las búsquedas no devuelven cursor y siguen usando skip)
+      const response = await getEvents(queryFilters, {
+        ...nextPagination,
+        cursor: nextCursor ?? undefined,
+      });
       
       set({
         events: [...events, ...response.items],
         pagination: nextPagination,
-        hasMore: nextPagination.skip + nextPagination.limit < response.total,
+        hasMore: response.hasMore,
+        nextCursor: response.nextCursor ?? null,
         loading: false,
       });
     } catch (error) {
@@ -21,7 +21,9 @@ export interface Event {
 
 export interface EventListResponse {
   items: Event[];
-  total: number;
+  total?: number | null;
+  hasMore: boolean;
+  nextCursor?: string | null;
 }
 
 export interface EventFilters {
@@ -36,6 +38,8 @@ export interface EventFilters {
 export interface PaginationParams {
   skip: number;
   limit: number;
+  // nextCursor de la página anterior; si está, el backend ignora skip
+  cursor?: string;
 }
 
 export interface EventRequest {